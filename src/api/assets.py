@@ -0,0 +1,128 @@
+import hashlib
+import html
+import re
+import sys
+from pathlib import Path
+
+STATIC_DIR = Path(__file__).parent / "static"
+FONTS_DIR = STATIC_DIR / "fonts"
+STATIC_PREFIX = "/static/"
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# file stem prefix -> CSS family; files are named <Prefix>-<weight>.woff2
+FONT_FAMILIES = {
+    "SpaceGrotesk": ("Space Grotesk", (400, 600, 700)),
+    "IBMPlexMono": ("IBM Plex Mono", (400, 500)),
+}
+GOOGLE_FONTS_CSS = (
+    "https://fonts.googleapis.com/css2"
+    "?family=Space+Grotesk:wght@400;600;700&family=IBM+Plex+Mono:wght@400;500"
+)
+
+MEDIA_TYPES = {
+    ".css": "text/css; charset=utf-8",
+    ".js": "text/javascript; charset=utf-8",
+    ".woff2": "font/woff2",
+}
+
+
+def _versioned(name, data):
+    stem, ext = name.rsplit(".", 1)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}.{ext}"
+
+
+class Assets:
+    # Static files keyed by content-hashed name, so every URL can be cached
+    # forever and a deploy that changes a file changes its URL.
+    def __init__(self, static_dir=STATIC_DIR):
+        self.files = {}
+        self.urls = {}
+        self.fonts = []
+
+        faces = []
+        for prefix, (family, weights) in FONT_FAMILIES.items():
+            for weight in weights:
+                path = static_dir / "fonts" / f"{prefix}-{weight}.woff2"
+                if not path.exists():
+                    continue
+                url = self._add(path.name, path.read_bytes())
+                self.fonts.append(url)
+                faces.append(
+                    "@font-face {\n"
+                    f'  font-family: "{family}";\n'
+                    "  font-style: normal;\n"
+                    f"  font-weight: {weight};\n"
+                    "  font-display: swap;\n"
+                    f'  src: local("{family}"), url("{url}") format("woff2");\n'
+                    "}\n"
+                )
+
+        css = "".join(faces) + (static_dir / "dashboard.css").read_text()
+        self._add("dashboard.css", css.encode())
+        self._add("dashboard.js", (static_dir / "dashboard.js").read_bytes())
+        self.index = (static_dir / "index.html").read_text()
+
+    def _add(self, name, data):
+        versioned = _versioned(name, data)
+        self.files[versioned] = (data, MEDIA_TYPES[Path(name).suffix])
+        self.urls[name] = STATIC_PREFIX + versioned
+        return self.urls[name]
+
+    def get(self, versioned):
+        return self.files.get(versioned)
+
+    def render_index(self, symbol, initial_json):
+        preload = "".join(
+            f'  <link rel="preload" href="{url}" as="font" type="font/woff2" crossorigin />\n'
+            for url in self.fonts
+        )
+        # initial_json sits inside <script>; keep "</script>" from closing it.
+        initial_json = initial_json.replace("<", "\\u003c")
+        out = self.index
+        for key, value in (
+            ("{{title}}", html.escape(f"{symbol} Volatility Live")),
+            ("{{heading}}", html.escape(f"{symbol} Volatility Forecast")),
+            ("{{preload}}\n", preload),
+            ("{{css}}", self.urls["dashboard.css"]),
+            ("{{js}}", self.urls["dashboard.js"]),
+            ("{{initial}}", initial_json),
+        ):
+            out = out.replace(key, value)
+        return out
+
+
+def fetch_fonts(dest=FONTS_DIR):
+    import requests
+
+    # Google serves woff2 only to user agents it knows support it.
+    headers = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 Chrome/120.0 Safari/537.36"}
+    css = requests.get(GOOGLE_FONTS_CSS, headers=headers, timeout=30)
+    css.raise_for_status()
+
+    names = {family: prefix for prefix, (family, _) in FONT_FAMILIES.items()}
+    dest.mkdir(parents=True, exist_ok=True)
+    # Keep only the latin subset of each face.
+    pattern = re.compile(
+        r"/\* latin \*/\s*@font-face\s*{(?P<body>[^}]*)}", re.MULTILINE
+    )
+    saved = 0
+    for m in pattern.finditer(css.text):
+        body = m.group("body")
+        family = re.search(r"font-family:\s*'([^']+)'", body).group(1)
+        weight = re.search(r"font-weight:\s*(\d+)", body).group(1)
+        url = re.search(r"url\((https://[^)]+\.woff2)\)", body).group(1)
+        r = requests.get(url, timeout=30)
+        r.raise_for_status()
+        path = dest / f"{names[family]}-{weight}.woff2"
+        path.write_bytes(r.content)
+        saved += 1
+        print("saved", path.name, len(r.content))
+    return saved
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["fetch-fonts"]:
+        fetch_fonts()
+    else:
+        print("usage: python -m src.api.assets fetch-fonts")
+        sys.exit(2)
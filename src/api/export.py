@@ -0,0 +1,191 @@
+import csv
+import io
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import text
+
+CHUNK_ROWS = 50_000
+
+# dataset -> (table, time column, filter columns, output columns)
+DATASETS = {
+    "candles": (
+        "candles",
+        "open_time",
+        ("symbol", "interval"),
+        ("symbol", "interval", "open_time", "open", "high", "low", "close", "volume"),
+    ),
+    "returns_5m": (
+        "returns_5m",
+        "time",
+        ("symbol",),
+        ("symbol", "time", "close", "r"),
+    ),
+    "predictions": (
+        "predictions",
+        "predicted_for",
+        ("symbol", "freq", "target", "model"),
+        ("symbol", "freq", "target", "model", "predicted_for", "yhat", "created_at"),
+    ),
+}
+
+FORMATS = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+    "csv": "text/csv",
+}
+
+_TEXT_COLUMNS = {"symbol", "interval", "freq", "target", "model"}
+_TIME_COLUMNS = {"open_time", "time", "predicted_for", "created_at"}
+
+
+def build_query(dataset, filters, start=None, end=None):
+    table, time_col, filter_cols, columns = DATASETS[dataset]
+    where = []
+    params = {}
+    for col in filter_cols:
+        if filters.get(col) is not None:
+            where.append(f"{col} = :{col}")
+            params[col] = filters[col]
+    if start is not None:
+        where.append(f"{time_col} >= :start")
+        params["start"] = start
+    if end is not None:
+        where.append(f"{time_col} < :end")
+        params["end"] = end
+    sql = f"SELECT {', '.join(columns)} FROM {table}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    # The filter columns followed by the time column are the table's primary
+    # key, so rows stream off the index instead of after a full sort.
+    sql += f" ORDER BY {', '.join((*filter_cols, time_col))}"
+    return text(sql), params
+
+
+def iter_chunks(engine, dataset, filters, start=None, end=None, chunk_rows=CHUNK_ROWS):
+    # Named server-side cursor: the driver only holds one chunk at a time.
+    q, params = build_query(dataset, filters, start, end)
+    with engine.connect() as conn:
+        result = conn.execution_options(
+            stream_results=True, max_row_buffer=chunk_rows
+        ).execute(q, params)
+        for rows in result.partitions(chunk_rows):
+            yield rows
+
+
+def _arrow_schema(columns):
+    import pyarrow as pa
+
+    fields = []
+    for col in columns:
+        if col in _TEXT_COLUMNS:
+            fields.append(pa.field(col, pa.string()))
+        elif col in _TIME_COLUMNS:
+            fields.append(pa.field(col, pa.timestamp("us", tz="UTC")))
+        else:
+            fields.append(pa.field(col, pa.float64()))
+    return pa.schema(fields)
+
+
+def _to_batch(rows, columns, schema):
+    import pyarrow as pa
+
+    arrays = []
+    for i, col in enumerate(columns):
+        values = [row[i] for row in rows]
+        if schema.field(col).type == pa.float64():
+            values = [float(v) if v is not None else None for v in values]
+        arrays.append(pa.array(values, type=schema.field(col).type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _ChunkSink:
+    # Write-only file object for pyarrow writers that hands back whatever
+    # was written since the last drain, while keeping absolute offsets
+    # (the Parquet footer records them).
+    def __init__(self):
+        self._parts = []
+        self._pos = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self):
+        return True
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def _stream_arrow(chunks, columns):
+    import pyarrow as pa
+
+    schema = _arrow_schema(columns)
+    sink = _ChunkSink()
+    writer = pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), schema)
+    for rows in chunks:
+        writer.write_batch(_to_batch(rows, columns, schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def _stream_parquet(chunks, columns):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(columns)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="zstd")
+    for rows in chunks:
+        writer.write_batch(_to_batch(rows, columns, schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def _csv_value(v):
+    if isinstance(v, datetime):
+        return v.isoformat()
+    if isinstance(v, Decimal):
+        return format(v, "f")
+    return v
+
+
+def _stream_csv(chunks, columns):
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    w.writerow(columns)
+    for rows in chunks:
+        for row in rows:
+            w.writerow([_csv_value(v) for v in row])
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate(0)
+    yield buf.getvalue().encode()
+
+
+def stream_export(engine, dataset, fmt, filters, start=None, end=None, chunk_rows=CHUNK_ROWS):
+    columns = DATASETS[dataset][3]
+    chunks = iter_chunks(engine, dataset, filters, start, end, chunk_rows)
+    if fmt == "arrow":
+        return _stream_arrow(chunks, columns)
+    if fmt == "parquet":
+        return _stream_parquet(chunks, columns)
+    if fmt == "csv":
+        return _stream_csv(chunks, columns)
+    raise ValueError(f"Unsupported format: {fmt}")
@@ -1,18 +1,79 @@
+import json
 import os
-import statistics
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timezone, timedelta
-from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
-from sqlalchemy import create_engine, text
-from sqlalchemy.exc import ProgrammingError
-
-DB_URL = os.environ["DATABASE_URL"]
-if DB_URL.startswith("postgresql://"):
-    DB_URL = DB_URL.replace("postgresql://", "postgresql+psycopg://", 1)
-engine = create_engine(DB_URL, pool_pre_ping=True)
+from typing import Literal, Optional
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
+from sqlalchemy.exc import ProgrammingError, SQLAlchemyError
+from src.api.assets import IMMUTABLE, Assets
+from src import hot_window
+from src.api.export import FORMATS, stream_export
+from src.db import queries
+from src.db.db import export_concurrency, get_engine, get_export_engine
+from src.instrumentation import HTTP_SECONDS, observe_freshness, render_metrics
+from src.modeling.rolling import VolatilityState
+
+DEFAULT_SYMBOL = os.getenv("DEFAULT_SYMBOL", "BTCUSDT")
+DEFAULT_INTERVAL = os.getenv("BINANCE_INTERVAL", "5m")
+DEFAULT_FREQ = "1h"
+DEFAULT_TARGET = "abs_return"
+DEFAULT_MODEL = os.getenv("DEFAULT_MODEL", "garch")
+
+RV_SHORT_HOURS = int(os.getenv("RV_SHORT_HOURS", "24"))
+RV_LONG_HOURS = int(os.getenv("RV_LONG_HOURS", "168"))
+REGIME_WINDOW_HOURS = int(os.getenv("REGIME_WINDOW_HOURS", "168"))
+# Query strings pick the key, so the per-key states are kept as a bounded LRU.
+VOL_STATE_CACHE = int(os.getenv("VOL_STATE_CACHE", "64"))
+
+CHART_HOURS = 25
+# The dashboard HTML embeds a snapshot, so it may be reused for as long as the
+# page would wait before its own refresh.
+HOME_MAX_AGE = 30
 
 app = FastAPI()
 
+@app.middleware("http")
+async def _timed(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    # label by route template, not raw path, to keep cardinality bounded
+    route = request.scope.get("route")
+    path = route.path if route is not None else "unmatched"
+    HTTP_SECONDS.labels(request.method, path, response.status_code).observe(
+        time.perf_counter() - start
+    )
+    return response
+
+_vol_states = OrderedDict()
+_vol_states_lock = threading.Lock()
+
+def _vol_state(symbol, freq, target, model):
+    key = (symbol, freq, target, model)
+    with _vol_states_lock:
+        state = _vol_states.get(key)
+        if state is None:
+            state = _vol_states[key] = VolatilityState(
+                RV_SHORT_HOURS, RV_LONG_HOURS, REGIME_WINDOW_HOURS
+            )
+            while len(_vol_states) > VOL_STATE_CACHE:
+                _vol_states.popitem(last=False)
+        else:
+            _vol_states.move_to_end(key)
+        return state
+
+def _returns_generation(conn, symbol):
+    # None until the hourly builder has revised the symbol's returns; in a
+    # savepoint since the table only exists once the builder has run
+    try:
+        with conn.begin_nested():
+            row = queries.RETURNS_GENERATION.first(conn, {"symbol": symbol})
+    except ProgrammingError:
+        return None
+    return row["generation"] if row else None
+
 def _hourly_bins(rows):
     buckets = {}
     for row in rows:
@@ -36,383 +97,63 @@ def _hourly_pred(rows):
         buckets[hour] = float(y)
     return sorted(buckets.items())
 
-PAGE = """
-<!doctype html>
-<html>
-<head>
-  <meta charset="utf-8" />
-  <title>BTC Volatility Live</title>
-  <style>
-    @import url("https://fonts.googleapis.com/css2?family=Space+Grotesk:wght@400;600;700&family=IBM+Plex+Mono:wght@400;500&display=swap");
-  </style>
-  <style>
-    :root {
-      --bg: #f6f7fb;
-      --card: #ffffff;
-      --ink: #0d1015;
-      --muted: #5f6b7a;
-      --accent: #1f4fd6;
-      --accent-2: #e0672f;
-      --border: #e3e8f0;
-    }
-    * { box-sizing: border-box; }
-    body {
-      margin: 0;
-      padding: 28px;
-      font-family: "Space Grotesk", system-ui, sans-serif;
-      color: var(--ink);
-      background:
-        radial-gradient(1200px 600px at 10% -10%, #dfe8ff 0%, transparent 60%),
-        radial-gradient(800px 500px at 100% 0%, #ffe9d8 0%, transparent 55%),
-        var(--bg);
-    }
-    .wrap { max-width: 980px; margin: 0 auto; }
-    h1 { font-size: 32px; margin: 0 0 6px 0; }
-    .sub { color: var(--muted); margin: 0 0 16px 0; }
-    .grid { display: grid; grid-template-columns: repeat(3, minmax(0, 1fr)); gap: 14px; margin-bottom: 14px; }
-    .card {
-      background: var(--card);
-      border: 1px solid var(--border);
-      border-radius: 16px;
-      padding: 16px 18px;
-      box-shadow: 0 1px 0 rgba(15, 23, 42, 0.02);
-    }
-    .k { color: var(--muted); font-size: 12px; letter-spacing: 0.04em; text-transform: uppercase; }
-    .v { font-size: 24px; font-weight: 700; margin-top: 6px; }
-    .mono { font-family: "IBM Plex Mono", ui-monospace, SFMono-Regular, Menlo, monospace; }
-    .small { color: var(--muted); font-size: 12px; margin-top: 6px; }
-    .badge {
-      display: inline-flex; align-items: center; gap: 8px;
-      padding: 6px 10px; border-radius: 999px;
-      background: #eef2ff; color: #253b80; font-size: 12px; font-weight: 600;
-      border: 1px solid #d6deff;
-    }
-    .badge.high { background: #ffe8e1; border-color: #ffd1c1; color: #7b2c14; }
-    .badge.low { background: #e7f7ef; border-color: #c7efd9; color: #1e5a3a; }
-    .row { display: flex; align-items: center; justify-content: space-between; gap: 10px; }
-    .chart-card { padding: 16px 18px 10px; }
-    canvas { width: 100%; height: 220px; border: 1px solid var(--border); border-radius: 12px; }
-    @media (max-width: 900px) {
-      .grid { grid-template-columns: 1fr; }
-    }
-  </style>
-</head>
-<body>
-  <div class="wrap">
-    <div class="row" style="margin-bottom: 8px;">
-      <div>
-        <h1>BTC Volatility Forecast</h1>
-        <p class="sub">Next‑hour expected move and recent regime context.</p>
-      </div>
-      <div class="badge" id="regime_badge">Vol regime: —</div>
-    </div>
-
-    <div class="grid">
-      <div class="card">
-        <div class="k">Latest close</div>
-        <div class="v mono" id="price">—</div>
-        <div class="small mono" id="price_time">—</div>
-      </div>
-      <div class="card">
-        <div class="k">Expected move (1h, 1σ)</div>
-        <div class="v" id="move">—</div>
-        <div class="small" id="move_pct">—</div>
-      </div>
-      <div class="card">
-        <div class="k">Next‑hour range</div>
-        <div class="v mono" id="range_68">—</div>
-        <div class="small mono" id="range_95">—</div>
-      </div>
-    </div>
-
-    <div class="grid">
-      <div class="card">
-        <div class="k">Last hour |return|</div>
-        <div class="v" id="last_abs_move">—</div>
-        <div class="small" id="last_abs_return">—</div>
-      </div>
-      <div class="card">
-        <div class="k">Realized vol (24h)</div>
-        <div class="v" id="rv24">—</div>
-        <div class="small" id="rv24_pct">—</div>
-      </div>
-      <div class="card">
-        <div class="k">Realized vol (7d)</div>
-        <div class="v" id="rv7d">—</div>
-        <div class="small" id="rv7d_pct">—</div>
-      </div>
-    </div>
-
-    <div class="card chart-card">
-      <div class="k">Last 25h: Actual |return| vs Predicted |return|</div>
-      <canvas id="chart" width="900" height="220"></canvas>
-      <p class="small">Actual = solid line. Predicted = dashed line.</p>
-      <p class="small" id="status"></p>
-    </div>
-  </div>
-
-
-<script>
-const fmtUsd = (v, d=0) =>
-  v == null ? "—" : `$${Number(v).toLocaleString("en-US", {minimumFractionDigits:d, maximumFractionDigits:d})}`;
-const fmtPct = (v, d=2) =>
-  v == null ? "—" : `${(Number(v) * 100).toFixed(d)}%`;
-
-function drawLine(ctx, points, dashed=false, color="#111") {
-  if (points.length < 2) return;
-  ctx.save();
-  ctx.strokeStyle = color;
-  if (dashed) ctx.setLineDash([6, 4]);
-  ctx.beginPath();
-  ctx.moveTo(points[0].x, points[0].y);
-  for (let i = 1; i < points.length; i++) ctx.lineTo(points[i].x, points[i].y);
-  ctx.stroke();
-  ctx.restore();
-}
-
-function scalePoints(series, w, h, pad, yMax, tMin, tMax) {
-  const n = series.length;
-  if (n === 0) return [];
-  const span = Math.max(1, tMax - tMin);
-  return series.map((p, i) => {
-    const t = new Date(p.t).getTime();
-    const x = pad + ((t - tMin) / span) * (w - 2*pad);
-    const y = pad + (1 - (p.v / yMax)) * (h - 2*pad);
-    return {x, y};
-  });
-}
-
-async function refreshChart() {
-  const hours = 25;
-  const [aRes, pRes] = await Promise.all([
-    fetch(`/v1/series/abs_returns?hours=${hours}`),
-    fetch(`/v1/series/predictions?hours=${hours}`)
-  ]);
-  const actual = await aRes.json();
-  const pred = await pRes.json();
-
-  const canvas = document.getElementById("chart");
-  const ctx = canvas.getContext("2d");
-  const w = canvas.width, h = canvas.height, pad = 18;
-
-  // clear
-  ctx.clearRect(0,0,w,h);
-
-  // choose a shared y scale
-  const maxA = actual.reduce((m,p)=>Math.max(m,p.v), 0);
-  const maxP = pred.reduce((m,p)=>Math.max(m,p.v), 0);
-  const yMax = Math.max(1e-9, maxA, maxP) * 1.1;
-
-  // time range (extend 1h beyond latest actual)
-  const tActual = actual.map(p => new Date(p.t).getTime());
-  const tPred = pred.map(p => new Date(p.t).getTime());
-  const tMin = Math.min(...tActual, ...tPred);
-  const lastActual = tActual.length ? Math.max(...tActual) : Date.now();
-  const tMax = Math.max(lastActual + 60 * 60 * 1000, ...tPred, lastActual);
-
-  // axes
-  ctx.beginPath();
-  ctx.moveTo(pad, pad);
-  ctx.lineTo(pad, h - pad);
-  ctx.lineTo(w - pad, h - pad);
-  ctx.stroke();
-
-  // lines
-  const aPts = scalePoints(actual, w, h, pad, yMax, tMin, tMax);
-  const pPts = scalePoints(pred, w, h, pad, yMax, tMin, tMax);
-  drawLine(ctx, aPts, false, "#1f4fd6");
-  drawLine(ctx, pPts, true, "#e0672f");
-
-  // label yMax
-  ctx.fillStyle = "#111";
-  ctx.fillText(`yMax≈${yMax.toFixed(4)}`, pad + 6, pad + 10);
-}
-
-async function refresh() {
-  try {
-    const r = await fetch("/v1/latest");
-    const j = await r.json();
-
-    document.getElementById("price").textContent = fmtUsd(j.latest_close, 2);
-    document.getElementById("price_time").textContent = j.latest_close_time ?? "—";
-
-    document.getElementById("move").textContent = j.expected_move != null
-      ? `${fmtUsd(j.expected_move, 0)} next hour`
-      : "—";
-    document.getElementById("move_pct").textContent = j.expected_move_pct != null
-      ? `${fmtPct(j.expected_move_pct / 100, 2)} | for ${j.predicted_for ?? "—"}`
-      : "—";
-
-    document.getElementById("range_68").textContent =
-      (j.range_68_low != null && j.range_68_high != null)
-        ? `${fmtUsd(j.range_68_low, 0)} – ${fmtUsd(j.range_68_high, 0)}`
-        : "—";
-    document.getElementById("range_95").textContent =
-      (j.range_95_low != null && j.range_95_high != null)
-        ? `95%: ${fmtUsd(j.range_95_low, 0)} – ${fmtUsd(j.range_95_high, 0)}`
-        : "—";
-
-    document.getElementById("last_abs_move").textContent = j.last_abs_move != null
-      ? fmtUsd(j.last_abs_move, 0)
-      : "—";
-    document.getElementById("last_abs_return").textContent = j.last_abs_return != null
-      ? `|r| = ${fmtPct(j.last_abs_return, 3)}`
-      : "—";
-
-    document.getElementById("rv24").textContent = j.rv24_move != null
-      ? fmtUsd(j.rv24_move, 0)
-      : "—";
-    document.getElementById("rv24_pct").textContent = j.rv24_std != null
-      ? `σ ≈ ${fmtPct(j.rv24_std, 3)} (24h)`
-      : "—";
-
-    document.getElementById("rv7d").textContent = j.rv7d_move != null
-      ? fmtUsd(j.rv7d_move, 0)
-      : "—";
-    document.getElementById("rv7d_pct").textContent = j.rv7d_std != null
-      ? `σ ≈ ${fmtPct(j.rv7d_std, 3)} (7d)`
-      : "—";
-
-    const badge = document.getElementById("regime_badge");
-    if (j.vol_regime) {
-      badge.textContent = `Vol regime: ${j.vol_regime}` + (j.vol_percentile != null ? ` (${Math.round(j.vol_percentile * 100)}th pct)` : "");
-      badge.classList.remove("high", "low");
-      if (j.vol_regime === "High") badge.classList.add("high");
-      if (j.vol_regime === "Low") badge.classList.add("low");
-    } else {
-      badge.textContent = "Vol regime: —";
-      badge.classList.remove("high", "low");
-    }
-
-    await refreshChart();
-
-    document.getElementById("status").textContent =
-      "Updated: " + new Date().toISOString();
-  } catch (e) {
-    document.getElementById("status").textContent =
-      "Error: " + (e?.message ?? String(e));
-  }
-}
-refresh();
-setInterval(refresh, 30000);
-</script>
-</body>
-</html>
-"""
-
-@app.get("/", response_class=HTMLResponse)
-def home():
-    return HTMLResponse(PAGE)
+assets = Assets()
 
 @app.get("/v1/series/abs_returns")
-def series_abs_returns(hours: int = 48):
-    q = text("""
-      SELECT time, r
-      FROM returns_5m
-      WHERE symbol='BTCUSDT'
-        AND time >= now() - (:hours || ' hours')::interval
-      ORDER BY time
-    """)
-    with engine.begin() as conn:
-        rows = conn.execute(q, {"hours": hours + 2}).mappings().all()
+def series_abs_returns(hours: int = 48, symbol: str = DEFAULT_SYMBOL):
+    rows = queries.fetch_all(
+        queries.RETURNS_WINDOW,
+        {"symbol": symbol, "window": timedelta(hours=hours + 2)},
+    )
     cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
     hourly = _hourly_bins(rows)
     return [{"t": t.isoformat(), "v": abs(r)} for t, r in hourly if t >= cutoff]
 
 @app.get("/v1/series/predictions")
-def series_predictions(hours: int = 48):
-    q = text("""
-      SELECT predicted_for, yhat
-      FROM predictions
-      WHERE symbol='BTCUSDT' AND freq='1h' AND target='abs_return'
-        AND predicted_for >= now() - (:hours || ' hours')::interval
-      ORDER BY predicted_for
-    """)
-    with engine.begin() as conn:
-        rows = conn.execute(q, {"hours": hours}).mappings().all()
+def series_predictions(
+    hours: int = 48,
+    symbol: str = DEFAULT_SYMBOL,
+    freq: str = DEFAULT_FREQ,
+    target: str = DEFAULT_TARGET,
+    model: str = DEFAULT_MODEL,
+):
+    rows = queries.fetch_all(
+        queries.PREDICTIONS_WINDOW,
+        {
+            "symbol": symbol,
+            "freq": freq,
+            "target": target,
+            "model": model,
+            "window": timedelta(hours=hours),
+        },
+    )
     cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
     hourly = _hourly_pred(rows)
     return [{"t": t.isoformat(), "v": v} for t, v in hourly if t >= cutoff]
 
-@app.get("/v1/latest")
-def latest():
-    # Latest candle close (5m)
-    q_candle = text("""
-      SELECT open_time, close
-      FROM candles
-      WHERE symbol = 'BTCUSDT' AND interval = '5m'
-      ORDER BY open_time DESC
-      LIMIT 1
-    """)
-
-    # Latest prediction
-    q_pred = text("""
-      SELECT predicted_for, yhat
-      FROM predictions
-      WHERE symbol = 'BTCUSDT' AND freq = '1h' AND target = 'abs_return'
-      ORDER BY predicted_for DESC
-      LIMIT 1
-    """)
-
-    q_recent_r = text("""
-      SELECT time, r
-      FROM returns_5m
-      WHERE symbol = 'BTCUSDT'
-        AND time >= now() - (:hours || ' hours')::interval
-      ORDER BY time
-    """)
-    q_pred_hist = text("""
-      SELECT yhat
-      FROM predictions
-      WHERE symbol = 'BTCUSDT' AND freq = '1h' AND target = 'abs_return'
-        AND predicted_for >= now() - (:hours || ' hours')::interval
-      ORDER BY predicted_for
-    """)
-
-    with engine.begin() as conn:
-        c = conn.execute(q_candle).mappings().first()
-        r7d = conn.execute(q_recent_r, {"hours": 169}).mappings().all()
-        try:
-            p = conn.execute(q_pred).mappings().first()
-            p_hist = conn.execute(q_pred_hist, {"hours": 168}).mappings().all()
-        except ProgrammingError:
-            p = None
-            p_hist = []
-
-    def _to_float(x):
-        return float(x) if x is not None else None
-
-    def _stdev(values):
-        if len(values) < 2:
-            return None
-        return statistics.pstdev(values)
-
-    price = _to_float(c["close"]) if c else None
-    yhat = _to_float(p["yhat"]) if p else None
-
+def _to_float(x):
+    return float(x) if x is not None else None
+
+def _snapshot(
+    close_time,
+    price,
+    predicted_for,
+    yhat,
+    last_abs_return,
+    rv24_std,
+    rv7d_std,
+    vol_percentile,
+):
     expected_move = price * yhat if price is not None and yhat is not None else None
     range_68_low = price - expected_move if expected_move is not None else None
     range_68_high = price + expected_move if expected_move is not None else None
     range_95_low = price - (1.96 * expected_move) if expected_move is not None else None
     range_95_high = price + (1.96 * expected_move) if expected_move is not None else None
 
-    hourly = _hourly_bins(r7d)
-    last_abs_return = abs(hourly[-1][1]) if hourly else None
     last_abs_move = price * last_abs_return if price is not None and last_abs_return is not None else None
-
-    cutoff_24 = datetime.now(timezone.utc) - timedelta(hours=24)
-    r24_vals = [r for t, r in hourly if t >= cutoff_24]
-    r7d_vals = [r for _, r in hourly]
-    rv24_std = _stdev(r24_vals)
-    rv7d_std = _stdev(r7d_vals)
     rv24_move = price * rv24_std if price is not None and rv24_std is not None else None
     rv7d_move = price * rv7d_std if price is not None and rv7d_std is not None else None
 
-    yhat_hist = [_to_float(row["yhat"]) for row in p_hist if row["yhat"] is not None]
-    vol_percentile = None
-    if yhat is not None and yhat_hist:
-        count = sum(1 for v in yhat_hist if v <= yhat)
-        vol_percentile = count / len(yhat_hist)
     if vol_percentile is None:
         vol_regime = None
     elif vol_percentile >= 0.7:
@@ -423,9 +164,9 @@ def latest():
         vol_regime = "Normal"
 
     return {
-        "latest_close_time": (c["open_time"].isoformat() if c else None),
+        "latest_close_time": (close_time.isoformat() if close_time else None),
         "latest_close": price,
-        "predicted_for": (p["predicted_for"].isoformat() if p else None),
+        "predicted_for": (predicted_for.isoformat() if predicted_for else None),
         "yhat": yhat,
         "expected_move": expected_move,
         "expected_move_pct": (yhat * 100 if yhat is not None else None),
@@ -443,6 +184,217 @@ def latest():
         "vol_regime": vol_regime,
     }
 
+@app.get("/v1/latest")
+def latest(
+    symbol: str = DEFAULT_SYMBOL,
+    interval: str = DEFAULT_INTERVAL,
+    freq: str = DEFAULT_FREQ,
+    target: str = DEFAULT_TARGET,
+    model: str = DEFAULT_MODEL,
+):
+    pred_params = {"symbol": symbol, "freq": freq, "target": target, "model": model}
+    state = _vol_state(symbol, freq, target, model)
+    with state.lock, get_engine().begin() as conn:
+        generation = _returns_generation(conn, symbol)
+        if generation != state.returns_generation:
+            # returns already folded in were revised: reseed from scratch
+            state.reset_returns()
+            state.returns_generation = generation
+        c = queries.LATEST_CANDLE.first(conn, {"symbol": symbol, "interval": interval})
+        window = state.long_window + timedelta(hours=1)
+        if state.last_return_time is None:
+            since = datetime.now(timezone.utc) - window
+        else:
+            since = state.last_return_time
+        # rows at exactly `since` are already in the state and get skipped
+        r_new = hot_window.rows_from(symbol, since)
+        if r_new is None and state.last_return_time is None:
+            r_new = queries.RETURNS_WINDOW.all(conn, {"symbol": symbol, "window": window})
+        elif r_new is None:
+            r_new = queries.RETURNS_AFTER.all(conn, {"symbol": symbol, "since": since})
+        try:
+            p = queries.LATEST_PREDICTION.first(conn, pred_params)
+            if state.last_prediction_time is None:
+                p_new = queries.PREDICTIONS_WINDOW.all(
+                    conn, {**pred_params, "window": state.regime_window}
+                )
+            else:
+                p_new = queries.PREDICTIONS_AFTER.all(
+                    conn, {**pred_params, "since": state.last_prediction_time}
+                )
+        except ProgrammingError:
+            p = None
+            p_new = []
+
+        state.add_returns(r_new)
+        state.add_predictions(p_new)
+        if c:
+            observe_freshness("candles", symbol, c["open_time"])
+        observe_freshness("returns_5m", symbol, state.last_return_time)
+        state.evict(datetime.now(timezone.utc))
+
+        price = _to_float(c["close"]) if c else None
+        yhat = _to_float(p["yhat"]) if p else None
+        last_abs_return = state.last_abs_return()
+        rv24_std = state.rv_short.pstdev()
+        rv7d_std = state.rv_long.pstdev()
+        vol_percentile = state.percentile_of(yhat)
+
+    return _snapshot(
+        c["open_time"] if c else None,
+        price,
+        p["predicted_for"] if p else None,
+        yhat,
+        last_abs_return,
+        rv24_std,
+        rv7d_std,
+        vol_percentile,
+    )
+
+@app.get("/v1/latest/batch")
+def latest_batch(
+    symbols: str = DEFAULT_SYMBOL,
+    interval: str = DEFAULT_INTERVAL,
+    freq: str = DEFAULT_FREQ,
+    target: str = DEFAULT_TARGET,
+    model: str = DEFAULT_MODEL,
+):
+    wanted = list(dict.fromkeys(s.strip() for s in symbols.split(",") if s.strip()))
+    if not wanted:
+        return {}
+    params = {
+        "symbols": wanted,
+        "interval": interval,
+        "freq": freq,
+        "target": target,
+        "model": model,
+        "short_window": timedelta(hours=RV_SHORT_HOURS),
+        "long_window": timedelta(hours=RV_LONG_HOURS),
+        "regime_window": timedelta(hours=REGIME_WINDOW_HOURS),
+    }
+    rows = queries.fetch_all(queries.LATEST_BATCH, params)
+
+    out = {}
+    for row in rows:
+        last_r = _to_float(row["last_r"])
+        out[row["symbol"]] = _snapshot(
+            row["open_time"],
+            _to_float(row["close"]),
+            row["predicted_for"],
+            _to_float(row["yhat"]),
+            abs(last_r) if last_r is not None else None,
+            _to_float(row["rv24_std"]),
+            _to_float(row["rv7d_std"]),
+            _to_float(row["vol_percentile"]),
+        )
+    return out
+
+@app.get("/v1/scores")
+def scores(
+    symbol: str = DEFAULT_SYMBOL,
+    freq: str = DEFAULT_FREQ,
+    target: str = DEFAULT_TARGET,
+    model: str = DEFAULT_MODEL,
+):
+    try:
+        rows = queries.fetch_all(
+            queries.SCORE_ROLLUPS,
+            {"symbol": symbol, "freq": freq, "target": target, "model": model},
+        )
+    except ProgrammingError:
+        # scorer has not created its tables yet
+        rows = []
+    return {
+        row["period"]: {
+            "n": row["n"],
+            "mae": row["mae"],
+            "rmse": row["rmse"],
+            "mean_qlike": row["mean_qlike"],
+            "bias": row["bias"],
+            "updated_at": row["updated_at"].isoformat(),
+        }
+        for row in rows
+    }
+
+@app.get("/metrics")
+def metrics():
+    data, content_type = render_metrics()
+    return Response(data, media_type=content_type)
+
+@app.get("/v1/query_stats")
+def query_stats():
+    return queries.query_stats()
+
+def _initial_data(symbol):
+    try:
+        data = {
+            "symbol": symbol,
+            "latest": latest(symbol=symbol),
+            "abs_returns": series_abs_returns(hours=CHART_HOURS, symbol=symbol),
+            "predictions": series_predictions(hours=CHART_HOURS, symbol=symbol),
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+        }
+    except SQLAlchemyError:
+        # Serve the shell anyway; the page fetches the API itself.
+        return None
+    return data
+
+@app.get("/", response_class=HTMLResponse)
+def home(symbol: str = DEFAULT_SYMBOL):
+    html = assets.render_index(symbol, json.dumps(_initial_data(symbol)))
+    return HTMLResponse(html, headers={"Cache-Control": f"public, max-age={HOME_MAX_AGE}"})
+
+@app.get("/static/{name}")
+def static(name: str):
+    asset = assets.get(name)
+    if asset is None:
+        return Response(status_code=404)
+    data, media_type = asset
+    return Response(data, media_type=media_type, headers={"Cache-Control": IMMUTABLE})
+
+# One slot per connection in the export pool: a download past the limit is
+# turned away up front rather than left waiting on the pool mid-response.
+_export_slots = threading.BoundedSemaphore(export_concurrency())
+
+def _release_after(body, slot):
+    try:
+        yield from body
+    finally:
+        slot.release()
+
+@app.get("/v1/export/{dataset}")
+def export(
+    dataset: Literal["candles", "returns_5m", "predictions"],
+    format: Literal["arrow", "parquet", "csv"] = "arrow",
+    symbol: Optional[str] = None,
+    interval: Optional[str] = None,
+    freq: Optional[str] = None,
+    target: Optional[str] = None,
+    model: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    filters = {
+        "symbol": symbol,
+        "interval": interval,
+        "freq": freq,
+        "target": target,
+        "model": model,
+    }
+    if not _export_slots.acquire(blocking=False):
+        return Response(
+            "too many exports in progress", status_code=503, headers={"Retry-After": "30"}
+        )
+    body = _release_after(
+        stream_export(get_export_engine(), dataset, format, filters, start, end), _export_slots
+    )
+    ext = "arrows" if format == "arrow" else format
+    return StreamingResponse(
+        body,
+        media_type=FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{ext}"'},
+    )
+
 def main():
     import uvicorn
     uvicorn.run("src.api.main:app", host="0.0.0.0", port=8000, reload=False)
@@ -0,0 +1,158 @@
+const INITIAL = JSON.parse(document.getElementById("initial").textContent || "null");
+const SYMBOL = INITIAL?.symbol
+  ?? new URLSearchParams(location.search).get("symbol")
+  ?? "BTCUSDT";
+const QS = `symbol=${encodeURIComponent(SYMBOL)}`;
+const CHART_HOURS = 25;
+
+const fmtUsd = (v, d=0) =>
+  v == null ? "—" : `$${Number(v).toLocaleString("en-US", {minimumFractionDigits:d, maximumFractionDigits:d})}`;
+const fmtPct = (v, d=2) =>
+  v == null ? "—" : `${(Number(v) * 100).toFixed(d)}%`;
+
+function drawLine(ctx, points, dashed=false, color="#111") {
+  if (points.length < 2) return;
+  ctx.save();
+  ctx.strokeStyle = color;
+  if (dashed) ctx.setLineDash([6, 4]);
+  ctx.beginPath();
+  ctx.moveTo(points[0].x, points[0].y);
+  for (let i = 1; i < points.length; i++) ctx.lineTo(points[i].x, points[i].y);
+  ctx.stroke();
+  ctx.restore();
+}
+
+function scalePoints(series, w, h, pad, yMax, tMin, tMax) {
+  const n = series.length;
+  if (n === 0) return [];
+  const span = Math.max(1, tMax - tMin);
+  return series.map((p, i) => {
+    const t = new Date(p.t).getTime();
+    const x = pad + ((t - tMin) / span) * (w - 2*pad);
+    const y = pad + (1 - (p.v / yMax)) * (h - 2*pad);
+    return {x, y};
+  });
+}
+
+async function refreshChart() {
+  const [aRes, pRes] = await Promise.all([
+    fetch(`/v1/series/abs_returns?hours=${CHART_HOURS}&${QS}`),
+    fetch(`/v1/series/predictions?hours=${CHART_HOURS}&${QS}`)
+  ]);
+  drawChart(await aRes.json(), await pRes.json());
+}
+
+function drawChart(actual, pred) {
+  const canvas = document.getElementById("chart");
+  const ctx = canvas.getContext("2d");
+  const w = canvas.width, h = canvas.height, pad = 18;
+
+  // clear
+  ctx.clearRect(0,0,w,h);
+
+  // choose a shared y scale
+  const maxA = actual.reduce((m,p)=>Math.max(m,p.v), 0);
+  const maxP = pred.reduce((m,p)=>Math.max(m,p.v), 0);
+  const yMax = Math.max(1e-9, maxA, maxP) * 1.1;
+
+  // time range (extend 1h beyond latest actual)
+  const tActual = actual.map(p => new Date(p.t).getTime());
+  const tPred = pred.map(p => new Date(p.t).getTime());
+  const tMin = Math.min(...tActual, ...tPred);
+  const lastActual = tActual.length ? Math.max(...tActual) : Date.now();
+  const tMax = Math.max(lastActual + 60 * 60 * 1000, ...tPred, lastActual);
+
+  // axes
+  ctx.beginPath();
+  ctx.moveTo(pad, pad);
+  ctx.lineTo(pad, h - pad);
+  ctx.lineTo(w - pad, h - pad);
+  ctx.stroke();
+
+  // lines
+  const aPts = scalePoints(actual, w, h, pad, yMax, tMin, tMax);
+  const pPts = scalePoints(pred, w, h, pad, yMax, tMin, tMax);
+  drawLine(ctx, aPts, false, "#1f4fd6");
+  drawLine(ctx, pPts, true, "#e0672f");
+
+  // label yMax
+  ctx.fillStyle = "#111";
+  ctx.fillText(`yMax≈${yMax.toFixed(4)}`, pad + 6, pad + 10);
+}
+
+function render(j) {
+  document.getElementById("price").textContent = fmtUsd(j.latest_close, 2);
+  document.getElementById("price_time").textContent = j.latest_close_time ?? "—";
+
+  document.getElementById("move").textContent = j.expected_move != null
+    ? `${fmtUsd(j.expected_move, 0)} next hour`
+    : "—";
+  document.getElementById("move_pct").textContent = j.expected_move_pct != null
+    ? `${fmtPct(j.expected_move_pct / 100, 2)} | for ${j.predicted_for ?? "—"}`
+    : "—";
+
+  document.getElementById("range_68").textContent =
+    (j.range_68_low != null && j.range_68_high != null)
+      ? `${fmtUsd(j.range_68_low, 0)} – ${fmtUsd(j.range_68_high, 0)}`
+      : "—";
+  document.getElementById("range_95").textContent =
+    (j.range_95_low != null && j.range_95_high != null)
+      ? `95%: ${fmtUsd(j.range_95_low, 0)} – ${fmtUsd(j.range_95_high, 0)}`
+      : "—";
+
+  document.getElementById("last_abs_move").textContent = j.last_abs_move != null
+    ? fmtUsd(j.last_abs_move, 0)
+    : "—";
+  document.getElementById("last_abs_return").textContent = j.last_abs_return != null
+    ? `|r| = ${fmtPct(j.last_abs_return, 3)}`
+    : "—";
+
+  document.getElementById("rv24").textContent = j.rv24_move != null
+    ? fmtUsd(j.rv24_move, 0)
+    : "—";
+  document.getElementById("rv24_pct").textContent = j.rv24_std != null
+    ? `σ ≈ ${fmtPct(j.rv24_std, 3)} (24h)`
+    : "—";
+
+  document.getElementById("rv7d").textContent = j.rv7d_move != null
+    ? fmtUsd(j.rv7d_move, 0)
+    : "—";
+  document.getElementById("rv7d_pct").textContent = j.rv7d_std != null
+    ? `σ ≈ ${fmtPct(j.rv7d_std, 3)} (7d)`
+    : "—";
+
+  const badge = document.getElementById("regime_badge");
+  if (j.vol_regime) {
+    badge.textContent = `Vol regime: ${j.vol_regime}` + (j.vol_percentile != null ? ` (${Math.round(j.vol_percentile * 100)}th pct)` : "");
+    badge.classList.remove("high", "low");
+    if (j.vol_regime === "High") badge.classList.add("high");
+    if (j.vol_regime === "Low") badge.classList.add("low");
+  } else {
+    badge.textContent = "Vol regime: —";
+    badge.classList.remove("high", "low");
+  }
+}
+
+function setStatus(text) {
+  document.getElementById("status").textContent = text;
+}
+
+async function refresh() {
+  try {
+    const r = await fetch(`/v1/latest?${QS}`);
+    render(await r.json());
+    await refreshChart();
+    setStatus("Updated: " + new Date().toISOString());
+  } catch (e) {
+    setStatus("Error: " + (e?.message ?? String(e)));
+  }
+}
+
+if (INITIAL) {
+  render(INITIAL.latest);
+  drawChart(INITIAL.abs_returns, INITIAL.predictions);
+  setStatus("Updated: " + INITIAL.generated_at);
+} else {
+  refresh();
+}
+setInterval(refresh, 30000);
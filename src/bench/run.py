@@ -0,0 +1,168 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+SCHEMA_SQL = Path(__file__).resolve().parents[1] / "db" / "schema.sql"
+STAGES = ("insert_to_db", "build_hourly_returns", "get_hourly_df", "backtest_train", "predict_once", "api_latest")
+
+
+def _git_rev():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Timer:
+    def __init__(self):
+        self.results = []
+
+    def record(self, name, seconds, rows=None, **extra):
+        entry = {"stage": name, "seconds": round(seconds, 6), "rows": rows, **extra}
+        if rows and seconds > 0:
+            entry["rows_per_s"] = round(rows / seconds, 1)
+        self.results.append(entry)
+        print(f"{name:<22} {seconds:10.3f}s" + (f"  rows={rows}" if rows is not None else ""))
+
+    def run(self, name, fn, rows=None):
+        start = time.perf_counter()
+        out = fn()
+        elapsed = time.perf_counter() - start
+        self.record(name, elapsed, rows(out) if callable(rows) else rows)
+        return out
+
+
+def reset_db():
+    from sqlalchemy import text
+    from src.db.db import get_engine
+    from src.ingestion import gaps
+    from src.pipeline import build_hourly_returns
+
+    with get_engine().begin() as conn:
+        for stmt in SCHEMA_SQL.read_text().split(";"):
+            if stmt.strip():
+                conn.execute(text(stmt))
+        gaps.create_tables(conn)
+        for stmt in build_hourly_returns.SQL_CREATE.split(";"):
+            if stmt.strip():
+                conn.execute(text(stmt))
+        conn.execute(
+            text(
+                "TRUNCATE candles, candle_coverage, candle_gap_repairs,"
+                " returns_5m, returns_5m_generations, predictions, model_artifacts"
+            )
+        )
+
+
+def load(timer, args):
+    from src.bench.synthetic import generate_klines, symbols
+    from src.ingestion.binance import _interval_ms, insert_to_db
+
+    bars = int(args.days * 86_400_000 // _interval_ms(args.interval))
+    now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    start = now - timedelta(days=args.days)
+    start_ms = int(start.timestamp() * 1000)
+    start_ms -= start_ms % _interval_ms(args.interval)
+
+    gen_s = 0.0
+    insert_s = 0.0
+    rows = 0
+    for symbol in symbols(args.symbols):
+        pages = generate_klines(symbol, start_ms, bars, args.interval, seed=args.seed)
+        while True:
+            t0 = time.perf_counter()
+            page = next(pages, None)
+            t1 = time.perf_counter()
+            gen_s += t1 - t0
+            if page is None:
+                break
+            rows += insert_to_db(page, symbol=symbol, interval=args.interval)
+            insert_s += time.perf_counter() - t1
+    timer.record("generate", gen_s, rows)
+    timer.record("insert_to_db", insert_s, rows)
+
+
+def run_stages(timer, args):
+    from src.pipeline import build_hourly_returns
+    from src.modeling import backtest
+    from src.modeling.dataset import get_hourly_df
+    from src.jobs import predict_once
+
+    if "build_hourly_returns" in args.stages:
+        timer.run("build_hourly_returns", build_hourly_returns.main)
+    if "get_hourly_df" in args.stages:
+        timer.run("get_hourly_df", get_hourly_df, rows=lambda df: 0 if df is None else len(df))
+    if "backtest_train" in args.stages:
+        timer.run("backtest_train", backtest.train)
+    if "predict_once" in args.stages:
+        timer.run("predict_once", predict_once.main)
+    if "api_latest" in args.stages:
+        from src.api import main as api
+
+        timer.run("api_latest_cold", api.latest)
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            api.latest()
+        elapsed = time.perf_counter() - start
+        timer.record("api_latest_warm", elapsed, args.requests, mean_s=round(elapsed / args.requests, 6))
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="End-to-end pipeline benchmark on synthetic candles")
+    p.add_argument("--symbols", type=int, default=2)
+    p.add_argument("--days", type=float, default=30)
+    p.add_argument("--interval", default="5m")
+    p.add_argument("--seed", type=int, default=7)
+    p.add_argument("--requests", type=int, default=50, help="warm /v1/latest calls")
+    p.add_argument("--stages", default=",".join(STAGES), help="comma-separated subset of " + ",".join(STAGES))
+    p.add_argument("--out", default="bench_results.json")
+    args = p.parse_args(argv)
+    args.stages = set(args.stages.split(","))
+
+    # The benchmark truncates every table it touches, so it never runs against
+    # DATABASE_URL implicitly.
+    db_url = os.getenv("BENCH_DATABASE_URL")
+    if not db_url:
+        raise RuntimeError("BENCH_DATABASE_URL is not set (use a throwaway Postgres database)")
+    os.environ["DATABASE_URL"] = db_url
+    if args.interval != "5m":
+        print("note: the returns pipeline only reads 5m candles; later stages will see no data")
+
+    timer = Timer()
+    started = datetime.now(timezone.utc)
+    reset_db()
+    if "insert_to_db" in args.stages:
+        load(timer, args)
+    run_stages(timer, args)
+
+    from src.db.queries import query_stats
+
+    report = {
+        "started_at": started.isoformat(),
+        "git_rev": _git_rev(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {
+            "symbols": args.symbols,
+            "days": args.days,
+            "interval": args.interval,
+            "seed": args.seed,
+            "requests": args.requests,
+        },
+        "stages": timer.results,
+        "queries": query_stats(),
+    }
+    Path(args.out).write_text(json.dumps(report, indent=2, default=str))
+    print("wrote", args.out)
+
+
+if __name__ == "__main__":
+    main()
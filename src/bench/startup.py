@@ -0,0 +1,96 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from src.__main__ import COMMANDS
+from src.bench.run import _git_rev
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# What a cold `python -m src <command>` pays before the job does any work:
+# interpreter start plus importing the job's module.
+_COLD = "from src.__main__ import resolve; resolve({command!r})"
+
+
+def _python(code, *flags):
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return time.perf_counter() - start, out.stderr
+
+
+def _heaviest(importtime, n):
+    # -X importtime lines: "import time: self [us] | cumulative | name"
+    by_package = {}
+    for line in importtime.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        try:
+            self_us = int(fields[0])
+        except ValueError:
+            continue
+        package = fields[2].strip().split(".")[0]
+        by_package[package] = by_package.get(package, 0) + self_us
+    top = sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:n]
+    return [{"package": p, "seconds": round(us / 1e6, 4)} for p, us in top]
+
+
+def measure(command, repeats, top):
+    code = _COLD.format(command=command)
+    cold = [_python(code)[0] for _ in range(repeats)]
+    _, importtime = _python(code, "-X", "importtime")
+    return {
+        "command": command,
+        "cold_median_s": round(statistics.median(cold), 4),
+        "cold_min_s": round(min(cold), 4),
+        "heaviest": _heaviest(importtime, top),
+    }
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Cold-start cost of each `python -m src` command")
+    p.add_argument("--commands", default=",".join(COMMANDS), help="comma-separated subset")
+    p.add_argument("--repeats", type=int, default=5)
+    p.add_argument("--top", type=int, default=5, help="heaviest packages to report")
+    p.add_argument("--out", default="bench_startup.json")
+    args = p.parse_args(argv)
+
+    # Jobs only read DATABASE_URL on first query; a placeholder keeps any
+    # import-time access from failing without touching a database.
+    os.environ.setdefault("DATABASE_URL", "postgresql://bench@localhost/bench")
+
+    results = []
+    print(f"{'command':<14} {'cold':>8}  heaviest imports")
+    for command in args.commands.split(","):
+        r = measure(command, args.repeats, args.top)
+        results.append(r)
+        heavy = ", ".join(f"{h['package']} {h['seconds']:.2f}s" for h in r["heaviest"][:3])
+        print(f"{command:<14} {r['cold_median_s']:7.3f}s  {heavy}")
+
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "git_rev": _git_rev(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeats": args.repeats,
+        "commands": results,
+    }
+    Path(args.out).write_text(json.dumps(report, indent=2))
+    print("wrote", args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import numpy as np
+from src.ingestion.binance import _interval_ms
+
+# GARCH(1,1) parameters for a 5m bar. omega scales with bar length for other
+# intervals, so daily volatility stays roughly BTC-like (~4%).
+OMEGA_5M = 1e-7
+ALPHA = 0.08
+BETA = 0.90
+
+_BLOCK = 512
+
+
+def symbols(n):
+    return ["BTCUSDT"] + [f"SYN{i:02d}USDT" for i in range(1, n)]
+
+
+def garch_returns(n, rng, omega=OMEGA_5M, alpha=ALPHA, beta=BETA, s2=None):
+    # sigma2[t+1] = omega + (alpha * z[t]^2 + beta) * sigma2[t] is linear in
+    # sigma2 with a random coefficient, so each block is solved with cumulative
+    # products instead of a Python loop.
+    if s2 is None:
+        s2 = omega / (1.0 - alpha - beta)
+    out_r = np.empty(n)
+    out_s = np.empty(n)
+    for start in range(0, n, _BLOCK):
+        z = rng.standard_normal(min(_BLOCK, n - start))
+        a = alpha * z * z + beta
+        q = np.concatenate(([1.0], np.cumprod(a)))
+        sigma2 = q[:-1] * (s2 + omega * np.concatenate(([0.0], np.cumsum(1.0 / q[1:-1]))))
+        out_r[start:start + len(z)] = np.sqrt(sigma2) * z
+        out_s[start:start + len(z)] = np.sqrt(sigma2)
+        s2 = q[-1] * (s2 + omega * np.sum(1.0 / q[1:]))
+    return out_r, out_s, s2
+
+
+def generate_klines(symbol, start_ms, bars, interval="5m", seed=0, page=1000):
+    # Yields pages of Binance kline rows ([open_ms, open, high, low, close,
+    # volume, ...] as strings), so arbitrarily long histories stream in
+    # constant memory.
+    step = _interval_ms(interval)
+    scale = step / _interval_ms("5m")
+    omega = OMEGA_5M * scale
+    rng = np.random.default_rng([seed, sum(map(ord, symbol))])
+    price = float(rng.uniform(1.0, 60000.0)) if symbol != "BTCUSDT" else 40000.0
+    s2 = None
+    mean_sigma = (omega / (1.0 - ALPHA - BETA)) ** 0.5
+
+    for offset in range(0, bars, page):
+        n = min(page, bars - offset)
+        r, sigma, s2 = garch_returns(n, rng, omega=omega, s2=s2)
+        closes = price * np.exp(np.cumsum(r))
+        opens = np.concatenate(([price], closes[:-1]))
+        wick = np.abs(rng.normal(0.0, 0.5, n)) * sigma
+        highs = np.maximum(opens, closes) * np.exp(wick)
+        lows = np.minimum(opens, closes) * np.exp(-np.abs(rng.normal(0.0, 0.5, n)) * sigma)
+        volumes = rng.lognormal(3.0, 0.5, n) * (sigma / mean_sigma)
+        price = float(closes[-1])
+
+        rows = []
+        for i in range(n):
+            open_ms = start_ms + (offset + i) * step
+            rows.append(
+                [
+                    open_ms,
+                    f"{opens[i]:.8f}",
+                    f"{highs[i]:.8f}",
+                    f"{lows[i]:.8f}",
+                    f"{closes[i]:.8f}",
+                    f"{volumes[i]:.8f}",
+                    open_ms + step - 1,
+                ]
+            )
+        yield rows
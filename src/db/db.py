@@ -1,6 +1,6 @@
 import os
 from functools import lru_cache
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
 
 
 def _normalize_db_url(db_url: str) -> str:
@@ -9,9 +9,49 @@ def _normalize_db_url(db_url: str) -> str:
     return db_url
 
 
-@lru_cache(maxsize=1)
-def get_engine():
+def _prepare_threshold():
+    # psycopg prepares a statement server-side once it has been executed this
+    # many times on a connection; 0 prepares on first use, "none" disables
+    # (needed behind pgbouncer in transaction mode).
+    value = os.getenv("DB_PREPARE_THRESHOLD", "0")
+    if value.lower() == "none":
+        return None
+    return int(value)
+
+
+def _create_engine(pool_size, max_overflow):
     db_url = os.getenv("DATABASE_URL")
     if not db_url:
         raise RuntimeError("DATABASE_URL is not set")
-    return create_engine(_normalize_db_url(db_url), future=True)
+    url = make_url(_normalize_db_url(db_url))
+    if url.drivername != "postgresql+psycopg":
+        # pool sizing and prepare_threshold are tuned for psycopg 3; any
+        # other URL gets its dialect's defaults
+        return create_engine(url, future=True)
+    return create_engine(
+        url,
+        future=True,
+        pool_pre_ping=True,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        connect_args={"prepare_threshold": _prepare_threshold()},
+    )
+
+
+@lru_cache(maxsize=1)
+def get_engine():
+    return _create_engine(
+        int(os.getenv("DB_POOL_SIZE", "5")), int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    )
+
+
+def export_concurrency():
+    return int(os.getenv("EXPORT_CONCURRENCY", "2"))
+
+
+@lru_cache(maxsize=1)
+def get_export_engine():
+    # Bulk exports hold a connection for the whole download, so they get a
+    # pool of their own rather than starving the API's short queries.
+    return _create_engine(export_concurrency(), 0)
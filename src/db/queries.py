@@ -0,0 +1,551 @@
+import threading
+import time
+from sqlalchemy import Integer, Interval, LargeBinary, Numeric, String, DateTime, bindparam, text
+from src.db.db import get_engine
+from src.instrumentation import observe_query
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _record(name, seconds):
+    with _stats_lock:
+        s = _stats.get(name)
+        if s is None:
+            s = _stats[name] = {"calls": 0, "total_s": 0.0, "max_s": 0.0}
+        s["calls"] += 1
+        s["total_s"] += seconds
+        s["max_s"] = max(s["max_s"], seconds)
+    observe_query(name, seconds)
+
+
+def query_stats():
+    with _stats_lock:
+        items = [
+            {"query": name, **s, "mean_s": s["total_s"] / s["calls"]}
+            for name, s in _stats.items()
+        ]
+    return sorted(items, key=lambda s: s["total_s"], reverse=True)
+
+
+def reset_query_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+class Query:
+    # A named, typed statement. The SQL text is fixed, so psycopg keys its
+    # server-side prepared statement cache on it and repeated calls skip
+    # parse/plan (see DB_PREPARE_THRESHOLD in src.db.db).
+    def __init__(self, name, sql, *binds):
+        self.name = name
+        self.stmt = text(sql).bindparams(*binds) if binds else text(sql)
+
+    def execute(self, conn, params=None):
+        start = time.perf_counter()
+        try:
+            return conn.execute(self.stmt, params if params is not None else {})
+        finally:
+            _record(self.name, time.perf_counter() - start)
+
+    def all(self, conn, params=None):
+        return self.execute(conn, params).mappings().all()
+
+    def first(self, conn, params=None):
+        return self.execute(conn, params).mappings().first()
+
+
+def fetch_all(query, params=None):
+    with get_engine().begin() as conn:
+        return query.all(conn, params)
+
+
+def fetch_first(query, params=None):
+    with get_engine().begin() as conn:
+        return query.first(conn, params)
+
+
+def execute(query, params=None):
+    with get_engine().begin() as conn:
+        query.execute(conn, params)
+
+
+_symbol = bindparam("symbol", type_=String)
+_interval = bindparam("interval", type_=String)
+_freq = bindparam("freq", type_=String)
+_target = bindparam("target", type_=String)
+_model = bindparam("model", type_=String)
+_window = bindparam("window", type_=Interval)
+_step = bindparam("step", type_=Interval)
+
+
+# candles
+
+LATEST_OPEN_TIME = Query(
+    "latest_open_time",
+    """
+    SELECT MAX(open_time) AS max_open
+    FROM candles
+    WHERE symbol = :symbol AND interval = :interval
+    """,
+    _symbol,
+    _interval,
+)
+
+INSERT_CANDLES = Query(
+    "insert_candles",
+    """
+    INSERT INTO candles (
+        symbol, interval, open_time, open, high, low, close, volume
+    )
+    VALUES (:symbol, :interval, :open_time, :open, :high, :low, :close, :volume)
+    ON CONFLICT (symbol, interval, open_time) DO NOTHING
+    """,
+    _symbol,
+    _interval,
+    bindparam("open_time", type_=DateTime(timezone=True)),
+    bindparam("open", type_=Numeric),
+    bindparam("high", type_=Numeric),
+    bindparam("low", type_=Numeric),
+    bindparam("close", type_=Numeric),
+    bindparam("volume", type_=Numeric),
+)
+
+LATEST_CANDLE = Query(
+    "latest_candle",
+    """
+    SELECT open_time, close
+    FROM candles
+    WHERE symbol = :symbol AND interval = :interval
+    ORDER BY open_time DESC
+    LIMIT 1
+    """,
+    _symbol,
+    _interval,
+)
+
+
+# candle_coverage
+
+# Serializes coverage changes for one symbol/interval until commit: two
+# merges absorbing the same neighbouring run would both re-insert it.
+LOCK_COVERAGE = Query(
+    "lock_coverage",
+    "SELECT pg_advisory_xact_lock(hashtext(:symbol || :interval))",
+    _symbol,
+    _interval,
+)
+
+# Folds one contiguous run of inserted bars [start, end] into the coverage
+# index, absorbing every run it overlaps or touches. The DELETE/INSERT pair
+# only visits the neighbouring runs, never the candles themselves.
+MERGE_COVERAGE = Query(
+    "merge_coverage",
+    """
+    WITH hit AS (
+        DELETE FROM candle_coverage
+        WHERE symbol = :symbol AND interval = :interval
+          AND start_time <= :end_time + :step
+          AND end_time >= :start_time - :step
+        RETURNING start_time, end_time
+    )
+    INSERT INTO candle_coverage (symbol, interval, start_time, end_time)
+    SELECT
+        :symbol,
+        :interval,
+        LEAST(:start_time, MIN(start_time)),
+        GREATEST(:end_time, MAX(end_time))
+    FROM hit
+    """,
+    _symbol,
+    _interval,
+    _step,
+    bindparam("start_time", type_=DateTime(timezone=True)),
+    bindparam("end_time", type_=DateTime(timezone=True)),
+)
+
+# One-off gaps-and-islands pass for candles stored before the index existed;
+# a no-op once the symbol/interval has any coverage.
+BOOTSTRAP_COVERAGE = Query(
+    "bootstrap_coverage",
+    """
+    INSERT INTO candle_coverage (symbol, interval, start_time, end_time)
+    SELECT :symbol, :interval, MIN(open_time), MAX(open_time)
+    FROM (
+        SELECT open_time, open_time - :step * ROW_NUMBER() OVER (ORDER BY open_time) AS grp
+        FROM candles
+        WHERE symbol = :symbol AND interval = :interval
+    ) runs
+    WHERE NOT EXISTS (
+        SELECT 1 FROM candle_coverage WHERE symbol = :symbol AND interval = :interval
+    )
+    GROUP BY grp
+    """,
+    _symbol,
+    _interval,
+    _step,
+)
+
+COVERAGE_SUMMARY = Query(
+    "coverage_summary",
+    """
+    SELECT
+        MIN(start_time) AS first_open,
+        MAX(end_time) AS last_open,
+        COUNT(*) AS runs,
+        (EXTRACT(EPOCH FROM MAX(end_time) - MIN(start_time)) / EXTRACT(EPOCH FROM :step))::bigint + 1
+            AS expected_bars,
+        SUM((EXTRACT(EPOCH FROM end_time - start_time) / EXTRACT(EPOCH FROM :step))::bigint + 1)::bigint
+            AS present_bars
+    FROM candle_coverage
+    WHERE symbol = :symbol AND interval = :interval
+    """,
+    _symbol,
+    _interval,
+    _step,
+)
+
+# Missing bars between consecutive runs as [gap_start, gap_end] open times.
+# Gaps the exchange already answered with no data are left out.
+CANDLE_GAPS = Query(
+    "candle_gaps",
+    """
+    SELECT g.gap_start, g.gap_end,
+           (EXTRACT(EPOCH FROM g.gap_end - g.gap_start) / EXTRACT(EPOCH FROM :step))::bigint + 1
+               AS missing_bars
+    FROM (
+        SELECT
+            end_time + :step AS gap_start,
+            LEAD(start_time) OVER (ORDER BY start_time) - :step AS gap_end
+        FROM candle_coverage
+        WHERE symbol = :symbol AND interval = :interval
+    ) g
+    WHERE g.gap_end IS NOT NULL
+      AND NOT EXISTS (
+          SELECT 1
+          FROM candle_gap_repairs x
+          WHERE x.symbol = :symbol AND x.interval = :interval
+            AND x.gap_start = g.gap_start AND x.gap_end = g.gap_end
+            AND x.bars_fetched = 0
+      )
+    ORDER BY g.gap_start
+    """,
+    _symbol,
+    _interval,
+    _step,
+)
+
+INSERT_GAP_REPAIR = Query(
+    "insert_gap_repair",
+    """
+    INSERT INTO candle_gap_repairs (symbol, interval, gap_start, gap_end, attempted_at, bars_fetched)
+    VALUES (:symbol, :interval, :gap_start, :gap_end, now(), :bars_fetched)
+    ON CONFLICT (symbol, interval, gap_start, gap_end) DO UPDATE SET
+        attempted_at = EXCLUDED.attempted_at,
+        bars_fetched = EXCLUDED.bars_fetched,
+        returns_5m_built_at = NULL,
+        returns_1d_built_at = NULL
+    """,
+    _symbol,
+    _interval,
+    bindparam("gap_start", type_=DateTime(timezone=True)),
+    bindparam("gap_end", type_=DateTime(timezone=True)),
+    bindparam("bars_fetched", type_=Integer),
+)
+
+
+# returns_5m
+
+RETURNS_ALL = Query(
+    "returns_all",
+    """
+    SELECT symbol, time, close, r
+    FROM returns_5m
+    ORDER BY time
+    """,
+)
+
+RETURNS_FOR_SYMBOL = Query(
+    "returns_for_symbol",
+    """
+    SELECT time, r
+    FROM returns_5m
+    WHERE symbol = :symbol
+    ORDER BY time
+    """,
+    _symbol,
+)
+
+RECENT_RETURNS = Query(
+    "recent_returns",
+    """
+    SELECT time, r
+    FROM returns_5m
+    WHERE symbol = :symbol
+    ORDER BY time DESC
+    LIMIT :n
+    """,
+    _symbol,
+    bindparam("n", type_=Integer),
+)
+
+RETURNS_WINDOW = Query(
+    "returns_window",
+    """
+    SELECT time, r
+    FROM returns_5m
+    WHERE symbol = :symbol
+      AND time >= now() - :window
+    ORDER BY time
+    """,
+    _symbol,
+    _window,
+)
+
+RETURNS_AFTER = Query(
+    "returns_after",
+    """
+    SELECT time, r
+    FROM returns_5m
+    WHERE symbol = :symbol
+      AND time > :since
+    ORDER BY time
+    """,
+    _symbol,
+    bindparam("since", type_=DateTime(timezone=True)),
+)
+
+# Bumped by the hourly builder whenever a run inserts or rewrites returns at
+# or before the newest one it had already built (a gap repair), so readers
+# holding state derived from older returns know to reload it.
+RETURNS_GENERATION = Query(
+    "returns_generation",
+    """
+    SELECT generation
+    FROM returns_5m_generations
+    WHERE symbol = :symbol
+    """,
+    _symbol,
+)
+
+BUMP_RETURNS_GENERATION = Query(
+    "bump_returns_generation",
+    """
+    INSERT INTO returns_5m_generations (symbol, generation)
+    VALUES (:symbol, 1)
+    ON CONFLICT (symbol) DO UPDATE SET generation = returns_5m_generations.generation + 1
+    """,
+    _symbol,
+)
+
+
+# predictions
+
+LATEST_PREDICTION = Query(
+    "latest_prediction",
+    """
+    SELECT predicted_for, yhat
+    FROM predictions
+    WHERE symbol = :symbol AND freq = :freq AND target = :target AND model = :model
+    ORDER BY predicted_for DESC
+    LIMIT 1
+    """,
+    _symbol,
+    _freq,
+    _target,
+    _model,
+)
+
+PREDICTIONS_WINDOW = Query(
+    "predictions_window",
+    """
+    SELECT predicted_for, yhat
+    FROM predictions
+    WHERE symbol = :symbol AND freq = :freq AND target = :target AND model = :model
+      AND predicted_for >= now() - :window
+    ORDER BY predicted_for
+    """,
+    _symbol,
+    _freq,
+    _target,
+    _model,
+    _window,
+)
+
+PREDICTIONS_AFTER = Query(
+    "predictions_after",
+    """
+    SELECT predicted_for, yhat
+    FROM predictions
+    WHERE symbol = :symbol AND freq = :freq AND target = :target AND model = :model
+      AND predicted_for > :since
+    ORDER BY predicted_for
+    """,
+    _symbol,
+    _freq,
+    _target,
+    _model,
+    bindparam("since", type_=DateTime(timezone=True)),
+)
+
+# Predictions and model_artifacts gained a model column (and it joined the
+# predictions primary key) when the predictor started writing several
+# models per run; rows from before only ever held GARCH. Idempotent; run
+# by the writers in a transaction of its own before inserting. The catalog
+# is checked first: ALTER TABLE takes an ACCESS EXCLUSIVE lock even when
+# IF NOT EXISTS makes it a no-op.
+MIGRATE_MODEL_COLUMNS = Query(
+    "migrate_model_columns",
+    """
+    DO $$
+    BEGIN
+      IF NOT EXISTS (
+        SELECT 1 FROM pg_attribute
+        WHERE attrelid = 'model_artifacts'::regclass AND attname = 'model' AND NOT attisdropped
+      ) THEN
+        ALTER TABLE model_artifacts ADD COLUMN model TEXT NOT NULL DEFAULT 'garch';
+      END IF;
+      IF NOT EXISTS (
+        SELECT 1 FROM pg_attribute
+        WHERE attrelid = 'predictions'::regclass AND attname = 'model' AND NOT attisdropped
+      ) THEN
+        ALTER TABLE predictions ADD COLUMN model TEXT NOT NULL DEFAULT 'garch';
+      END IF;
+      IF NOT EXISTS (
+        SELECT 1
+        FROM pg_index i
+        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+        WHERE i.indrelid = 'predictions'::regclass AND i.indisprimary AND a.attname = 'model'
+      ) THEN
+        ALTER TABLE predictions DROP CONSTRAINT predictions_pkey;
+        ALTER TABLE predictions ADD PRIMARY KEY (symbol, freq, target, model, predicted_for);
+      END IF;
+    END
+    $$
+    """,
+)
+
+INSERT_PREDICTION = Query(
+    "insert_prediction",
+    """
+    INSERT INTO predictions (symbol, freq, target, model, predicted_for, yhat)
+    VALUES (:symbol, :freq, :target, :model, :pred_for, :yhat)
+    ON CONFLICT (symbol, freq, target, model, predicted_for) DO NOTHING
+    """,
+    _symbol,
+    _freq,
+    _target,
+    _model,
+    bindparam("pred_for", type_=DateTime(timezone=True)),
+    bindparam("yhat", type_=Numeric),
+)
+
+
+# prediction_scores
+
+SCORE_ROLLUPS = Query(
+    "score_rollups",
+    """
+    SELECT period, n, mae, rmse, mean_qlike, bias, updated_at
+    FROM prediction_score_rollups
+    WHERE symbol = :symbol AND freq = :freq AND target = :target AND model = :model
+    ORDER BY period
+    """,
+    _symbol,
+    _freq,
+    _target,
+    _model,
+)
+
+
+# model_artifacts
+
+INSERT_ARTIFACT = Query(
+    "insert_artifact",
+    """
+    INSERT INTO model_artifacts (symbol, freq, target, model, trained_at, artifact)
+    VALUES (:symbol, :freq, :target, :model, now(), :artifact)
+    """,
+    _symbol,
+    _freq,
+    _target,
+    _model,
+    bindparam("artifact", type_=LargeBinary),
+)
+
+
+# API snapshots
+
+# One round trip for a whole watchlist: hourly binning, realized vol and the
+# regime percentile are aggregated per symbol inside Postgres, and the
+# LATERAL lookups walk the primary keys for the latest candle/prediction.
+LATEST_BATCH = Query(
+    "latest_batch",
+    """
+    WITH syms AS (
+        SELECT symbol, ord
+        FROM unnest(CAST(:symbols AS text[])) WITH ORDINALITY AS s(symbol, ord)
+    ),
+    hourly AS (
+        SELECT symbol, date_trunc('hour', time) AS hour, SUM(r) AS r
+        FROM returns_5m
+        WHERE symbol = ANY(CAST(:symbols AS text[]))
+          AND time >= now() - :long_window - interval '1 hour'
+          AND r IS NOT NULL
+        GROUP BY symbol, date_trunc('hour', time)
+    ),
+    rv AS (
+        SELECT
+            symbol,
+            (array_agg(r ORDER BY hour DESC))[1] AS last_r,
+            CASE WHEN count(*) FILTER (WHERE hour >= now() - :short_window) >= 2
+                 THEN stddev_pop(r) FILTER (WHERE hour >= now() - :short_window) END AS rv24_std,
+            CASE WHEN count(*) FILTER (WHERE hour >= now() - :long_window) >= 2
+                 THEN stddev_pop(r) FILTER (WHERE hour >= now() - :long_window) END AS rv7d_std
+        FROM hourly
+        GROUP BY symbol
+    )
+    SELECT
+        s.symbol,
+        c.open_time,
+        c.close,
+        p.predicted_for,
+        p.yhat,
+        rv.last_r,
+        rv.rv24_std,
+        rv.rv7d_std,
+        ph.vol_percentile
+    FROM syms s
+    LEFT JOIN LATERAL (
+        SELECT open_time, close
+        FROM candles
+        WHERE symbol = s.symbol AND interval = :interval
+        ORDER BY open_time DESC
+        LIMIT 1
+    ) c ON true
+    LEFT JOIN LATERAL (
+        SELECT predicted_for, yhat
+        FROM predictions
+        WHERE symbol = s.symbol AND freq = :freq AND target = :target AND model = :model
+        ORDER BY predicted_for DESC
+        LIMIT 1
+    ) p ON true
+    LEFT JOIN rv ON rv.symbol = s.symbol
+    LEFT JOIN LATERAL (
+        SELECT
+            CASE WHEN p.yhat IS NOT NULL AND count(*) > 0
+                 THEN (count(*) FILTER (WHERE h.yhat <= p.yhat))::float8 / count(*) END AS vol_percentile
+        FROM predictions h
+        WHERE h.symbol = s.symbol AND h.freq = :freq AND h.target = :target AND h.model = :model
+          AND h.predicted_for >= now() - :regime_window
+    ) ph ON true
+    ORDER BY s.ord
+    """,
+    _interval,
+    _freq,
+    _target,
+    _model,
+    bindparam("short_window", type_=Interval),
+    bindparam("long_window", type_=Interval),
+    bindparam("regime_window", type_=Interval),
+)
@@ -15,6 +15,7 @@ CREATE TABLE IF NOT EXISTS model_artifacts (
   symbol TEXT NOT NULL,
   freq TEXT NOT NULL,
   target TEXT NOT NULL,
+  model TEXT NOT NULL DEFAULT 'garch',
   trained_at TIMESTAMPTZ NOT NULL,
   artifact BYTEA NOT NULL
 );
@@ -23,8 +24,12 @@ CREATE TABLE IF NOT EXISTS predictions (
   symbol TEXT NOT NULL,
   freq TEXT NOT NULL,
   target TEXT NOT NULL,
+  model TEXT NOT NULL DEFAULT 'garch',
   predicted_for TIMESTAMPTZ NOT NULL,
   yhat NUMERIC NOT NULL,
   created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
-  PRIMARY KEY (symbol, freq, target, predicted_for)
+  PRIMARY KEY (symbol, freq, target, model, predicted_for)
 );
+
+CREATE INDEX IF NOT EXISTS predictions_predicted_for_idx
+  ON predictions (predicted_for);
@@ -0,0 +1,228 @@
+import mmap
+import os
+import struct
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from src.db import queries
+
+# A resident copy of the newest 5m returns per symbol, shared between the
+# pipeline (sole writer) and the predictor/API (readers) through one mmap'd
+# file per symbol under HOT_WINDOW_DIR (a tmpfs such as /dev/shm). Unset
+# disables it and everything reads Postgres as before.
+#
+# File layout: a 64-byte header, then two ring arrays of `capacity` slots:
+# int64 bar open times (epoch seconds) and float64 returns (NaN where r is
+# NULL). The header's seq is a seqlock: odd while the writer is mid-update,
+# so a reader that sees it change or odd retries rather than mixing states.
+
+MAGIC = b"TSHOTWIN"
+VERSION = 1
+_HEADER = struct.Struct("<8sII")
+_HEADER_SIZE = 64
+# int64 header slots at offset 16; COMPLETE is set when the last rebuild
+# got fewer rows than capacity, i.e. the ring holds the symbol's whole history
+_SEQ, _COUNT, _LAST, _COMPLETE = 0, 1, 2, 3
+_READ_ATTEMPTS = 100
+BAR = timedelta(minutes=5)
+
+
+def directory():
+    return os.getenv("HOT_WINDOW_DIR") or None
+
+
+def capacity():
+    return int(os.getenv("HOT_WINDOW_BARS", "4096"))
+
+
+def _path(symbol):
+    return os.path.join(directory(), f"returns_5m.{symbol}.ring")
+
+
+def _epoch(t):
+    return int(t.timestamp())
+
+
+class Ring:
+    def __init__(self, path, writable=False):
+        self.path = path
+        with open(path, "r+b" if writable else "rb") as f:
+            self.inode = os.fstat(f.fileno()).st_ino
+            access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+            self._mm = mmap.mmap(f.fileno(), 0, access=access)
+        magic, version, cap = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a v{VERSION} hot window file")
+        self.capacity = cap
+        self._hdr = np.ndarray((4,), dtype=np.int64, buffer=self._mm, offset=16)
+        self._times = np.ndarray((cap,), dtype=np.int64, buffer=self._mm, offset=_HEADER_SIZE)
+        self._r = np.ndarray(
+            (cap,), dtype=np.float64, buffer=self._mm, offset=_HEADER_SIZE + 8 * cap
+        )
+
+    @classmethod
+    def create(cls, path, cap):
+        # Built under a temporary name and renamed into place, so readers
+        # only ever open a complete file.
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.truncate(_HEADER_SIZE + 16 * cap)
+            f.write(_HEADER.pack(MAGIC, VERSION, cap))
+        os.replace(tmp, path)
+        return cls(path, writable=True)
+
+    @property
+    def count(self):
+        return int(self._hdr[_COUNT])
+
+    @property
+    def last_time(self):
+        if self._hdr[_COUNT] == 0:
+            return None
+        return datetime.fromtimestamp(int(self._hdr[_LAST]), tz=timezone.utc)
+
+    # writer side
+
+    def _write(self, times, r, reset):
+        times = np.asarray(times, dtype=np.int64)[-self.capacity:]
+        r = np.asarray(r, dtype=np.float64)[-self.capacity:]
+        # forced odd rather than incremented: a writer that died mid-update
+        # left seq odd, and +1 would invert the parity for good
+        self._hdr[_SEQ] |= 1
+        start = 0 if reset else int(self._hdr[_COUNT])
+        idx = (start + np.arange(len(times))) % self.capacity
+        self._times[idx] = times
+        self._r[idx] = r
+        self._hdr[_COUNT] = start + len(times)
+        if reset:
+            self._hdr[_COMPLETE] = len(times) < self.capacity
+        if len(times):
+            self._hdr[_LAST] = times[-1]
+        self._hdr[_SEQ] += 1
+
+    def append(self, times, r):
+        self._write(times, r, reset=False)
+
+    def reset(self, times, r):
+        self._write(times, r, reset=True)
+
+    # reader side
+
+    def tail(self, n=None):
+        # Copies the newest n bars (oldest first) out of the ring; the copy
+        # is what makes the read consistent, the mapping itself is shared.
+        for attempt in range(_READ_ATTEMPTS):
+            if attempt:
+                time.sleep(0)  # let the writer finish
+            seq = int(self._hdr[_SEQ])
+            if seq % 2:
+                continue
+            count = int(self._hdr[_COUNT])
+            k = min(count, self.capacity) if n is None else min(n, count, self.capacity)
+            idx = (count - k + np.arange(k)) % self.capacity
+            times = self._times[idx]
+            r = self._r[idx]
+            complete = bool(self._hdr[_COMPLETE]) and count <= self.capacity
+            if int(self._hdr[_SEQ]) == seq:
+                return times, r, complete
+        return None
+
+
+_readers = {}
+_readers_lock = threading.Lock()
+
+
+def _reader(symbol):
+    if directory() is None:
+        return None
+    path = _path(symbol)
+    try:
+        inode = os.stat(path).st_ino
+    except OSError:
+        return None
+    with _readers_lock:
+        ring = _readers.get(symbol)
+        if ring is None or ring.inode != inode:
+            try:
+                ring = _readers[symbol] = Ring(path)
+            except (OSError, ValueError):
+                return None
+        return ring
+
+
+def recent(symbol, n):
+    # The newest n bars as (epoch seconds, returns), or None when the window
+    # cannot answer (disabled, missing, or holds fewer bars than asked while
+    # older ones were evicted) and the caller should go to Postgres.
+    ring = _reader(symbol)
+    if ring is None:
+        return None
+    out = ring.tail(n)
+    if out is None:
+        return None
+    times, r, complete = out
+    if len(times) < n and not complete:
+        return None
+    return times, r
+
+
+def rows_from(symbol, start):
+    # Bars with time >= start as {"time", "r"} rows (r None where NULL), or
+    # None unless the window reaches back to start.
+    ring = _reader(symbol)
+    if ring is None:
+        return None
+    out = ring.tail()
+    if out is None:
+        return None
+    times, r, complete = out
+    since = _epoch(start)
+    if not complete and (len(times) == 0 or times[0] > since):
+        return None
+    i = int(np.searchsorted(times, since, side="left"))
+    return [
+        {
+            "time": datetime.fromtimestamp(int(t), tz=timezone.utc),
+            "r": None if np.isnan(v) else float(v),
+        }
+        for t, v in zip(times[i:], r[i:])
+    ]
+
+
+def _to_arrays(rows):
+    times = np.fromiter((_epoch(row["time"]) for row in rows), dtype=np.int64, count=len(rows))
+    r = np.fromiter(
+        (np.nan if row["r"] is None else float(row["r"]) for row in rows),
+        dtype=np.float64,
+        count=len(rows),
+    )
+    return times, r
+
+
+def sync(symbol, earliest):
+    # Called by the pipeline after it commits new returns for symbol, with
+    # the oldest time it inserted or changed. Appends when that is past the
+    # window's newest bar; anything older (a repaired gap) or a window too
+    # far behind is rebuilt from Postgres. Returns the bars written.
+    if directory() is None:
+        return 0
+    path = _path(symbol)
+    cap = capacity()
+    ring = None
+    try:
+        ring = Ring(path, writable=True)
+    except (OSError, ValueError):
+        pass
+    if ring is None or ring.capacity != cap:
+        os.makedirs(directory(), exist_ok=True)
+        ring = Ring.create(path, cap)
+
+    last = ring.last_time
+    if last is not None and earliest > last and earliest - last <= cap * BAR:
+        rows = queries.fetch_all(queries.RETURNS_AFTER, {"symbol": symbol, "since": last})
+        ring.append(*_to_arrays(rows))
+    else:
+        rows = queries.fetch_all(queries.RECENT_RETURNS, {"symbol": symbol, "n": cap})
+        ring.reset(*_to_arrays(rows[::-1]))
+    return len(rows)
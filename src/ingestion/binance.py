@@ -1,10 +1,12 @@
 import os
 from decimal import Decimal
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from math import log
 import requests
-from sqlalchemy import text
+from src.db import queries
 from src.db.db import get_engine
+from src.ingestion import gaps
+from src.instrumentation import log_event, observe_freshness, push, stage
 
 INTERVAL = os.getenv("BINANCE_INTERVAL", "5m")
 
@@ -20,7 +22,7 @@ def _interval_ms(interval: str) -> int:
         return value * 24 * 60 * 60 * 1000
     raise ValueError(f"Unsupported interval: {interval}")
 
-def get_btc_data(start_ms):
+def get_btc_data(start_ms, end_ms=None):
     symbol = "BTCUSDT"
     interval = INTERVAL
     limit = 1000
@@ -29,45 +31,45 @@ def get_btc_data(start_ms):
         "https://api.binance.com/api/v3/klines"
         f"?symbol={symbol}&interval={interval}&startTime={start_ms}&limit={limit}"
     )
-
-    r = requests.get(url)
-
-    r.raise_for_status()
-    return r.json()
-
-def insert_to_db(rows):
+    if end_ms is not None:
+        url += f"&endTime={end_ms}"
+
+    with stage("ingest", "fetch") as s:
+        r = requests.get(url)
+        r.raise_for_status()
+        rows = r.json()
+        s.add_rows(len(rows))
+        s.add_bytes(len(r.content))
+    return rows
+
+def insert_to_db(rows, symbol="BTCUSDT", interval=None):
     if not rows:
         return 0
 
-    symbol = "BTCUSDT"
-    interval = INTERVAL
-    insert_sql = """
-        INSERT INTO candles (
-            symbol, interval, open_time, open, high, low, close, volume
-        )
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        ON CONFLICT (symbol, interval, open_time) DO NOTHING
-    """
+    interval = interval or INTERVAL
 
     values = []
     for row in rows:
         open_time = datetime.utcfromtimestamp(row[0] / 1000.0)
         values.append(
-            (
-                symbol,
-                interval,
-                open_time,
-                Decimal(row[1]),
-                Decimal(row[2]),
-                Decimal(row[3]),
-                Decimal(row[4]),
-                Decimal(row[5]),
-            )
+            {
+                "symbol": symbol,
+                "interval": interval,
+                "open_time": open_time,
+                "open": Decimal(row[1]),
+                "high": Decimal(row[2]),
+                "low": Decimal(row[3]),
+                "close": Decimal(row[4]),
+                "volume": Decimal(row[5]),
+            }
         )
 
-    engine = get_engine()
-    with engine.begin() as conn:
-        conn.exec_driver_sql(insert_sql, values)
+    # candles and their coverage runs commit together so the index never
+    # claims bars that are not stored
+    with stage("ingest", "insert") as s, get_engine().begin() as conn:
+        queries.INSERT_CANDLES.execute(conn, values)
+        gaps.record_coverage(conn, symbol, interval, [row[0] for row in rows])
+        s.add_rows(len(values))
 
     return len(values)
 
@@ -75,14 +77,9 @@ def calculate_hourly_returns(close_t, close_t_1):
     return log(close_t) - log(close_t_1)
 
 def get_latest_open_time_ms():
-    engine = get_engine()
-    q = text("""
-      SELECT MAX(open_time) AS max_open
-      FROM candles
-      WHERE symbol = 'BTCUSDT' AND interval = :interval
-    """)
-    with engine.begin() as conn:
-        row = conn.execute(q, {"interval": INTERVAL}).mappings().first()
+    row = queries.fetch_first(
+        queries.LATEST_OPEN_TIME, {"symbol": "BTCUSDT", "interval": INTERVAL}
+    )
     if row and row["max_open"]:
         return int(row["max_open"].timestamp() * 1000)
     return None
@@ -93,7 +90,20 @@ def filter_closed_rows(rows):
     return [row for row in rows if row[0] + interval_ms <= now_ms]
     
 
-if __name__ == "__main__":
+def _report_gaps():
+    summary = gaps.summary("BTCUSDT", INTERVAL)
+    if summary and summary["missing_bars"]:
+        log_event(
+            "candle_gaps",
+            symbol="BTCUSDT",
+            interval=INTERVAL,
+            missing_bars=summary["missing_bars"],
+            runs=summary["runs"],
+        )
+
+
+def main():
+    gaps.ensure("BTCUSDT", INTERVAL)
     latest_ms = get_latest_open_time_ms()
     if latest_ms is None:
         end_time = datetime.utcnow()
@@ -114,3 +124,58 @@ if __name__ == "__main__":
         start_ms = rows[-1][0] + 1
         if inserted == 0 and latest_ms is not None:
             break
+
+    newest_ms = get_latest_open_time_ms()
+    if newest_ms is not None:
+        latest = datetime.fromtimestamp(newest_ms / 1000, tz=timezone.utc)
+        observe_freshness("candles", "BTCUSDT", latest)
+    _report_gaps()
+    push("ingest")
+
+
+def repair():
+    # Re-fetches only the windows the coverage index reports missing. A gap
+    # the exchange has no klines for (an outage on its side) is recorded
+    # with bars_fetched=0 and not asked for again.
+    gaps.ensure("BTCUSDT", INTERVAL)
+    interval_ms = _interval_ms(INTERVAL)
+    with stage("repair", "find") as s:
+        missing = gaps.find_gaps("BTCUSDT", INTERVAL)
+        s.add_rows(len(missing))
+
+    for gap in missing:
+        start_ms = int(gap["gap_start"].timestamp() * 1000)
+        end_ms = int(gap["gap_end"].timestamp() * 1000)
+        fetched = 0
+        while start_ms <= end_ms:
+            rows = [row for row in get_btc_data(start_ms, end_ms) if row[0] <= end_ms]
+            if not rows:
+                break
+            fetched += insert_to_db(rows)
+            start_ms = rows[-1][0] + interval_ms
+        queries.execute(
+            queries.INSERT_GAP_REPAIR,
+            {
+                "symbol": "BTCUSDT",
+                "interval": INTERVAL,
+                "gap_start": gap["gap_start"],
+                "gap_end": gap["gap_end"],
+                "bars_fetched": fetched,
+            },
+        )
+        log_event(
+            "gap_repair",
+            symbol="BTCUSDT",
+            interval=INTERVAL,
+            gap_start=gap["gap_start"],
+            gap_end=gap["gap_end"],
+            missing_bars=gap["missing_bars"],
+            fetched=fetched,
+        )
+
+    _report_gaps()
+    push("repair")
+
+
+if __name__ == "__main__":
+    main()
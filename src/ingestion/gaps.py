@@ -0,0 +1,147 @@
+import os
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import text
+from src.db import queries
+from src.db.db import get_engine
+from src.instrumentation import MISSING_BARS
+
+# candle_coverage stores the runs of consecutive bars present per
+# symbol/interval (start_time/end_time are open times of the first and last
+# bar), so "expected" is first..last and the gaps are the spaces between
+# runs. Integrity checks read a handful of runs instead of scanning candles.
+SQL_CREATE = """
+CREATE TABLE IF NOT EXISTS candle_coverage (
+  symbol TEXT NOT NULL,
+  interval TEXT NOT NULL,
+  start_time TIMESTAMPTZ NOT NULL,
+  end_time TIMESTAMPTZ NOT NULL,
+  PRIMARY KEY (symbol, interval, start_time)
+);
+CREATE TABLE IF NOT EXISTS candle_gap_repairs (
+  symbol TEXT NOT NULL,
+  interval TEXT NOT NULL,
+  gap_start TIMESTAMPTZ NOT NULL,
+  gap_end TIMESTAMPTZ NOT NULL,
+  attempted_at TIMESTAMPTZ NOT NULL,
+  bars_fetched INTEGER NOT NULL,
+  returns_5m_built_at TIMESTAMPTZ,
+  returns_1d_built_at TIMESTAMPTZ,
+  PRIMARY KEY (symbol, interval, gap_start, gap_end)
+);
+"""
+
+# The returns builders mark each repair once they have recomputed its
+# window; tables from before that get the columns, with every repair so far
+# counted as built. Checked in the catalog first, as ALTER TABLE locks the
+# table even when it ends up doing nothing.
+SQL_MIGRATE = """
+DO $$
+DECLARE
+  c TEXT;
+BEGIN
+  FOREACH c IN ARRAY ARRAY['returns_5m_built_at', 'returns_1d_built_at'] LOOP
+    IF NOT EXISTS (
+      SELECT 1 FROM pg_attribute
+      WHERE attrelid = 'candle_gap_repairs'::regclass AND attname = c AND NOT attisdropped
+    ) THEN
+      EXECUTE format('ALTER TABLE candle_gap_repairs ADD COLUMN %I TIMESTAMPTZ', c);
+      EXECUTE format('UPDATE candle_gap_repairs SET %I = now()', c);
+    END IF;
+  END LOOP;
+END
+$$
+"""
+
+
+def step(interval):
+    # deferred: binance imports this module
+    from src.ingestion.binance import _interval_ms
+
+    return timedelta(milliseconds=_interval_ms(interval))
+
+
+def runs(open_times_ms, step_ms):
+    # Splits bar open times into contiguous [first, last] runs.
+    out = []
+    for t in sorted(set(open_times_ms)):
+        if out and t == out[-1][1] + step_ms:
+            out[-1][1] = t
+        else:
+            out.append([t, t])
+    return out
+
+
+def _utc(ms):
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+
+
+def record_coverage(conn, symbol, interval, open_times_ms):
+    delta = step(interval)
+    params = [
+        {
+            "symbol": symbol,
+            "interval": interval,
+            "step": delta,
+            "start_time": _utc(first),
+            "end_time": _utc(last),
+        }
+        for first, last in runs(open_times_ms, delta // timedelta(milliseconds=1))
+    ]
+    if params:
+        queries.LOCK_COVERAGE.execute(conn, {"symbol": symbol, "interval": interval})
+        queries.MERGE_COVERAGE.execute(conn, params)
+
+
+def create_tables(conn):
+    for stmt in SQL_CREATE.split(";"):
+        if stmt.strip():
+            conn.execute(text(stmt))
+    conn.execute(text(SQL_MIGRATE))
+
+
+def ensure(symbol, interval):
+    with get_engine().begin() as conn:
+        create_tables(conn)
+        queries.LOCK_COVERAGE.execute(conn, {"symbol": symbol, "interval": interval})
+        queries.BOOTSTRAP_COVERAGE.execute(
+            conn, {"symbol": symbol, "interval": interval, "step": step(interval)}
+        )
+
+
+def find_gaps(symbol, interval):
+    return queries.fetch_all(
+        queries.CANDLE_GAPS, {"symbol": symbol, "interval": interval, "step": step(interval)}
+    )
+
+
+def summary(symbol, interval):
+    row = queries.fetch_first(
+        queries.COVERAGE_SUMMARY, {"symbol": symbol, "interval": interval, "step": step(interval)}
+    )
+    if row is None or row["first_open"] is None:
+        return None
+    out = dict(row)
+    out["missing_bars"] = out["expected_bars"] - out["present_bars"]
+    MISSING_BARS.labels(symbol, interval).set(out["missing_bars"])
+    return out
+
+
+def main():
+    symbol = os.getenv("GAPS_SYMBOL", "BTCUSDT")
+    interval = os.getenv("BINANCE_INTERVAL", "5m")
+    ensure(symbol, interval)
+    s = summary(symbol, interval)
+    if s is None:
+        print(f"{symbol} {interval}: no candles")
+        return
+    print(
+        f"{symbol} {interval}: {s['first_open'].isoformat()} .. {s['last_open'].isoformat()}"
+        f" expected={s['expected_bars']} present={s['present_bars']}"
+        f" missing={s['missing_bars']} runs={s['runs']}"
+    )
+    for g in find_gaps(symbol, interval):
+        print(f"  gap {g['gap_start'].isoformat()} .. {g['gap_end'].isoformat()} bars={g['missing_bars']}")
+
+
+if __name__ == "__main__":
+    main()
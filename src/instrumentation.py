@@ -0,0 +1,119 @@
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    push_to_gateway,
+)
+
+_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+STAGE_SECONDS = Histogram(
+    "pipeline_stage_seconds", "Wall time per pipeline stage", ["job", "stage"], buckets=_BUCKETS
+)
+STAGE_ROWS = Counter("pipeline_rows_total", "Rows processed per stage", ["job", "stage"])
+STAGE_BYTES = Counter("pipeline_bytes_total", "Bytes fetched or written per stage", ["job", "stage"])
+STAGE_ERRORS = Counter("pipeline_stage_errors_total", "Stages that raised", ["job", "stage"])
+FRESHNESS = Gauge(
+    "data_freshness_seconds", "Now minus the latest bar/row seen", ["table", "symbol"]
+)
+MISSING_BARS = Gauge(
+    "candle_missing_bars", "Bars missing between the first and last stored candle", ["symbol", "interval"]
+)
+QUERY_SECONDS = Histogram("db_query_seconds", "Execution time per named query", ["query"], buckets=_BUCKETS)
+HTTP_SECONDS = Histogram("http_request_seconds", "API request latency", ["method", "path", "status"], buckets=_BUCKETS)
+
+_log = logging.getLogger("src.instrumentation")
+
+
+def log_event(event, **fields):
+    if not _log.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        _log.addHandler(handler)
+        _log.setLevel(os.getenv("LOG_LEVEL", "INFO"))
+        _log.propagate = False
+    fields = {"ts": datetime.now(timezone.utc).isoformat(), "event": event, **fields}
+    _log.info(json.dumps(fields, default=str))
+
+
+class Stage:
+    def __init__(self):
+        self.rows = 0
+        self.bytes = 0
+        self.extra = {}
+
+    def add_rows(self, n):
+        self.rows += n or 0
+
+    def add_bytes(self, n):
+        self.bytes += n or 0
+
+
+@contextmanager
+def stage(job, name):
+    s = Stage()
+    start = time.perf_counter()
+    ok = True
+    try:
+        yield s
+    except BaseException:
+        ok = False
+        STAGE_ERRORS.labels(job, name).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.labels(job, name).observe(elapsed)
+        if s.rows:
+            STAGE_ROWS.labels(job, name).inc(s.rows)
+        if s.bytes:
+            STAGE_BYTES.labels(job, name).inc(s.bytes)
+        log_event(
+            "stage",
+            job=job,
+            stage=name,
+            seconds=round(elapsed, 6),
+            rows=s.rows,
+            bytes=s.bytes,
+            ok=ok,
+            **s.extra,
+        )
+
+
+def observe_freshness(table, symbol, latest, now=None):
+    if latest is None:
+        return None
+    if latest.tzinfo is None:
+        latest = latest.replace(tzinfo=timezone.utc)
+    lag = ((now or datetime.now(timezone.utc)) - latest).total_seconds()
+    FRESHNESS.labels(table, symbol).set(lag)
+    return lag
+
+
+def observe_query(name, seconds):
+    QUERY_SECONDS.labels(name).observe(seconds)
+
+
+def push(job):
+    # Jobs are short-lived processes, so their metrics are pushed rather than
+    # scraped when a Pushgateway is configured.
+    gateway = os.getenv("PROMETHEUS_PUSHGATEWAY")
+    if not gateway:
+        return
+    try:
+        push_to_gateway(gateway, job=job, registry=REGISTRY)
+    except OSError as e:
+        log_event("push_failed", job=job, error=str(e))
+
+
+def render_metrics():
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -1,24 +1,14 @@
-import os
 import pickle
 import pandas as pd
-from sqlalchemy import create_engine, text
-from arch import arch_model
+from src.db import queries
+from src.db.db import get_engine
+from src.instrumentation import push, stage
 
-DB_URL = os.environ["DATABASE_URL"]
-if DB_URL.startswith("postgresql://"):
-    DB_URL = DB_URL.replace("postgresql://", "postgresql+psycopg://", 1)
-engine = create_engine(DB_URL, pool_pre_ping=True)
+SYMBOL = "BTCUSDT"
 
 
 def load_returns_5m() -> pd.DataFrame:
-    q = text("""
-      SELECT time, r
-      FROM returns_5m
-      WHERE symbol = 'BTCUSDT'
-      ORDER BY time
-    """)
-    with engine.begin() as conn:
-        rows = conn.execute(q).mappings().all()
+    rows = queries.fetch_all(queries.RETURNS_FOR_SYMBOL, {"symbol": SYMBOL})
     df = pd.DataFrame(rows)
     if df.empty or "r" not in df.columns:
         return pd.DataFrame(columns=["time", "r"])
@@ -28,13 +18,18 @@ def load_returns_5m() -> pd.DataFrame:
 
 
 def main(hours: int = 50) -> None:
-    df = load_returns_5m()
+    with stage("backfill", "load") as s:
+        df = load_returns_5m()
+        s.add_rows(len(df))
     if df.empty:
         print("No returns available for backfill")
         return
 
-    am = arch_model(df["r"], mean="Zero", vol="GARCH", p=1, q=1, dist="normal")
-    res = am.fit(disp="off")
+    with stage("backfill", "fit"):
+        from arch import arch_model
+
+        am = arch_model(df["r"], mean="Zero", vol="GARCH", p=1, q=1, dist="normal")
+        res = am.fit(disp="off")
     sigma = pd.Series(res.conditional_volatility)
     if len(sigma) != len(df):
         f = res.forecast(horizon=1, reindex=True)
@@ -55,23 +50,18 @@ def main(hours: int = 50) -> None:
             }
         )
 
-    q_ins = text("""
-      INSERT INTO predictions (symbol, freq, target, predicted_for, yhat)
-      VALUES ('BTCUSDT', '1h', 'abs_return', :pred_for, :yhat)
-      ON CONFLICT (symbol, freq, target, predicted_for) DO NOTHING
-    """)
-    with engine.begin() as conn:
-        conn.execute(q_ins, rows)
-
-    artifact = pickle.dumps({"model_type": "garch", "model": res})
-    with engine.begin() as conn:
-        conn.execute(
-            text("""
-              INSERT INTO model_artifacts (symbol, freq, target, trained_at, artifact)
-              VALUES ('BTCUSDT', '1h', 'abs_return', now(), :artifact)
-            """),
-            {"artifact": artifact},
+    with stage("backfill", "pickle"):
+        artifact = pickle.dumps({"model_type": "garch", "model": res})
+    keys = {"symbol": SYMBOL, "freq": "1h", "target": "abs_return"}
+    queries.execute(queries.MIGRATE_MODEL_COLUMNS)
+    with stage("backfill", "write") as s, get_engine().begin() as conn:
+        queries.INSERT_PREDICTION.execute(
+            conn, [{**keys, "model": "garch", **row} for row in rows]
         )
+        queries.INSERT_ARTIFACT.execute(conn, {**keys, "model": "garch", "artifact": artifact})
+        s.add_rows(len(rows) + 1)
+        s.add_bytes(len(artifact))
+    push("backfill")
 
     print(f"backfilled {len(rows)} predictions")
 
@@ -1,65 +1,109 @@
 import os
-import pickle
-import pandas as pd
-from sqlalchemy import create_engine, text
-from arch import arch_model
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from src import hot_window
+from src.db import queries
+from src.db.db import get_engine
+from src.instrumentation import log_event, observe_freshness, push, stage
+from src.modeling.models import MODELS, horizon_bars, run_model
 
-DB_URL = os.environ["DATABASE_URL"]
-if DB_URL.startswith("postgresql://"):
-    DB_URL = DB_URL.replace("postgresql://", "postgresql+psycopg://", 1)
-engine = create_engine(DB_URL, pool_pre_ping=True)
+SYMBOL = "BTCUSDT"
+TARGET = "abs_return"
 
-def load_recent_returns(n=500) -> pd.DataFrame:
-    q = text("""
-      SELECT time, r
-      FROM returns_5m
-      WHERE symbol='BTCUSDT'
-      ORDER BY time DESC
-      LIMIT :n
-    """)
-    with engine.begin() as conn:
-        rows = conn.execute(q, {"n": n}).mappings().all()
-    df = pd.DataFrame(rows).sort_values("time")
-    if df.empty or "r" not in df.columns:
-        return pd.DataFrame(columns=["time", "r"])
-    df["r"] = pd.to_numeric(df["r"], errors="coerce")
-    df = df.dropna(subset=["r"])
-    return df.dropna().reset_index(drop=True)
+def _env_list(name, default):
+    return [v.strip() for v in os.getenv(name, default).split(",") if v.strip()]
+
+def load_recent_returns(n=500):
+    # (time of the newest bar, float returns oldest first), NULL returns
+    # dropped. Served from the hot window when the pipeline maintains one.
+    hot = hot_window.recent(SYMBOL, n)
+    if hot is not None:
+        times, r = hot
+        keep = ~np.isnan(r)
+        if not keep.any():
+            return None, np.empty(0)
+        last = datetime.fromtimestamp(int(times[keep][-1]), tz=timezone.utc)
+        return last, r[keep]
+
+    rows = queries.fetch_all(queries.RECENT_RETURNS, {"symbol": SYMBOL, "n": n})
+    rows = [row for row in reversed(rows) if row["r"] is not None]
+    if not rows:
+        return None, np.empty(0)
+    return rows[-1]["time"], np.array([float(row["r"]) for row in rows])
 
 def main():
-    df = load_recent_returns(1000)
-    if df.empty:
+    models = _env_list("PREDICT_MODELS", ",".join(MODELS))
+    freqs = _env_list("PREDICT_HORIZONS", "1h,4h,24h")
+    workers = int(os.getenv("PREDICT_WORKERS", "0")) or min(len(models), os.cpu_count() or 1)
+    horizons = {freq: horizon_bars(freq) for freq in freqs}
+
+    # Load once, sized for the hungriest model; each model slices its own tail.
+    with stage("predict", "load") as s:
+        last_time, r = load_recent_returns(max(MODELS[m][1] for m in models))
+        s.add_rows(len(r))
+    if last_time is None:
         print("No returns available for prediction")
         return
+    observe_freshness("returns_5m", SYMBOL, last_time)
 
-    am = arch_model(df["r"], mean="Zero", vol="GARCH", p=1, q=1, dist="normal")
-    res = am.fit(disp="off")
-    # forecast 12 steps ahead (5m * 12 = 60m)
-    f = res.forecast(horizon=12, reindex=False)
-    var_path = f.variance.iloc[-1].to_numpy()
-    yhat = (var_path.sum()) ** 0.5
+    results = []
+    with stage("predict", "fit") as s:
+        if workers > 1:
+            # Import arch here so forked workers inherit it; otherwise every
+            # worker pays for arch/scipy/statsmodels on every run.
+            import arch  # noqa: F401
 
-    # predict for next hour (last time + 1h)
-    last_time = df["time"].iloc[-1]
-    q_ins = text("""
-      INSERT INTO predictions (symbol, freq, target, predicted_for, yhat)
-      VALUES ('BTCUSDT', '1h', 'abs_return', :pred_for, :yhat)
-      ON CONFLICT (symbol, freq, target, predicted_for) DO NOTHING
-    """)
-    with engine.begin() as conn:
-        conn.execute(q_ins, {"pred_for": last_time + pd.Timedelta(hours=1), "yhat": yhat})
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    pool.submit(run_model, m, r, list(horizons.values())): m for m in models
+                }
+                for fut, name in futures.items():
+                    try:
+                        results.append(fut.result())
+                    except Exception as e:
+                        # one failing model must not drop the others' forecasts
+                        log_event("model_failed", model=name, error=repr(e))
+        else:
+            for name in models:
+                try:
+                    results.append(run_model(name, r, list(horizons.values())))
+                except Exception as e:
+                    log_event("model_failed", model=name, error=repr(e))
+        s.add_rows(len(results))
 
-    artifact = pickle.dumps({"model_type": "garch", "model": res})
-    with engine.begin() as conn:
-        conn.execute(
-            text("""
-              INSERT INTO model_artifacts (symbol, freq, target, trained_at, artifact)
-              VALUES ('BTCUSDT', '1h', 'abs_return', now(), :artifact)
-            """),
-            {"artifact": artifact},
+    pred_rows = []
+    artifact_rows = []
+    for name, forecasts, artifact in results:
+        for freq, bars in horizons.items():
+            pred_rows.append(
+                {
+                    "symbol": SYMBOL,
+                    "freq": freq,
+                    "target": TARGET,
+                    "model": name,
+                    "pred_for": last_time + timedelta(minutes=5 * bars),
+                    "yhat": forecasts[bars],
+                }
+            )
+        # one fit serves every horizon; like train's, it is keyed by the
+        # 5m bars it was fit on
+        artifact_rows.append(
+            {"symbol": SYMBOL, "freq": "5m", "target": TARGET, "model": name, "artifact": artifact}
         )
 
-    print("predicted_for", (last_time + pd.Timedelta(hours=1)).isoformat(), "yhat", yhat)
+    queries.execute(queries.MIGRATE_MODEL_COLUMNS)
+    with stage("predict", "write") as s, get_engine().begin() as conn:
+        if pred_rows:
+            queries.INSERT_PREDICTION.execute(conn, pred_rows)
+        if artifact_rows:
+            queries.INSERT_ARTIFACT.execute(conn, artifact_rows)
+        s.add_rows(len(pred_rows) + len(artifact_rows))
+        s.add_bytes(sum(len(a["artifact"]) for a in artifact_rows))
+    push("predict")
+
+    for row in pred_rows:
+        print("model", row["model"], "freq", row["freq"], "predicted_for", row["pred_for"].isoformat(), "yhat", row["yhat"])
 
 if __name__ == "__main__":
     main()
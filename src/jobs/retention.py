@@ -0,0 +1,269 @@
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from sqlalchemy import text
+from src.api.export import stream_export
+from src.db import queries
+from src.db.db import get_engine
+from src.ingestion import gaps
+from src.instrumentation import log_event, push, stage
+
+# Policies; 0 disables one.
+#   RETENTION_ARTIFACTS_KEEP     newest model_artifacts kept per symbol/freq/target/model
+#   RETENTION_CANDLES_5M_MONTHS  5m candles older than this many whole months are
+#                                archived to Parquet, rolled up into 1h candles
+#                                and deleted
+#   RETENTION_PREDICTIONS_MONTHS predictions older than this are archived and deleted
+# Work goes a calendar month at a time, and deletes run in RETENTION_BATCH-row
+# transactions so no statement holds locks for long. Each month is archived
+# (tmp file + rename) before anything is deleted, and every step is
+# idempotent, so an interrupted run just resumes.
+
+TABLES = ("candles", "predictions", "model_artifacts")
+
+SQL_TABLE_BYTES = "SELECT pg_total_relation_size(CAST(:table AS regclass))"
+
+SQL_TABLE_ROWS = "SELECT reltuples FROM pg_class WHERE oid = CAST(:table AS regclass)"
+
+SQL_DELETE_ARTIFACTS = """
+DELETE FROM model_artifacts
+WHERE id IN (
+  SELECT id
+  FROM (
+    SELECT id, ROW_NUMBER() OVER (
+      PARTITION BY symbol, freq, target, model ORDER BY trained_at DESC, id DESC
+    ) AS rn
+    FROM model_artifacts
+  ) ranked
+  WHERE rn > :keep
+  LIMIT :batch
+)
+"""
+
+SQL_5M_SYMBOLS = """
+SELECT DISTINCT symbol
+FROM candle_coverage
+WHERE interval = '5m'
+ORDER BY symbol
+"""
+
+SQL_OLDEST_5M = "SELECT MIN(open_time) FROM candles WHERE symbol = :symbol AND interval = '5m'"
+
+SQL_DOWNSAMPLE = """
+INSERT INTO candles (symbol, interval, open_time, open, high, low, close, volume)
+SELECT
+  symbol,
+  '1h',
+  date_trunc('hour', open_time),
+  (array_agg(open ORDER BY open_time))[1],
+  MAX(high),
+  MIN(low),
+  (array_agg(close ORDER BY open_time DESC))[1],
+  SUM(volume)
+FROM candles
+WHERE symbol = :symbol AND interval = '5m'
+  AND open_time >= :start AND open_time < :end
+GROUP BY symbol, date_trunc('hour', open_time)
+ON CONFLICT (symbol, interval, open_time) DO NOTHING
+RETURNING open_time
+"""
+
+# Brings the coverage index in line with the oldest 5m bar left: runs that
+# end before it go, and a run spanning it now starts there (the run being
+# contiguous, every bar from there on is still stored).
+SQL_TRIM_COVERAGE = """
+DELETE FROM candle_coverage
+WHERE symbol = :symbol AND interval = '5m'
+  AND end_time < COALESCE(
+    (SELECT MIN(open_time) FROM candles WHERE symbol = :symbol AND interval = '5m'),
+    'infinity'
+  );
+UPDATE candle_coverage
+SET start_time = (SELECT MIN(open_time) FROM candles WHERE symbol = :symbol AND interval = '5m')
+WHERE symbol = :symbol AND interval = '5m'
+  AND start_time < (SELECT MIN(open_time) FROM candles WHERE symbol = :symbol AND interval = '5m')
+"""
+
+SQL_DELETE_CANDLES = """
+DELETE FROM candles
+WHERE ctid = ANY(ARRAY(
+  SELECT ctid FROM candles
+  WHERE symbol = :symbol AND interval = '5m'
+    AND open_time >= :start AND open_time < :end
+  LIMIT :batch
+))
+"""
+
+SQL_OLDEST_PREDICTION = "SELECT MIN(predicted_for) FROM predictions"
+
+SQL_DELETE_PREDICTIONS = """
+DELETE FROM predictions
+WHERE ctid = ANY(ARRAY(
+  SELECT ctid FROM predictions
+  WHERE predicted_for >= :start AND predicted_for < :end
+  LIMIT :batch
+))
+"""
+
+
+def _month_start(t):
+    return t.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _add_months(t, n):
+    months = t.year * 12 + t.month - 1 + n
+    return t.replace(year=months // 12, month=months % 12 + 1)
+
+
+def months_before(oldest, cutoff):
+    # [start, end) calendar months from oldest's month up to cutoff
+    if oldest is None:
+        return
+    start = _month_start(oldest)
+    while start < cutoff:
+        end = _add_months(start, 1)
+        yield start, end
+        start = end
+
+
+def _scalar(sql, params=None):
+    with get_engine().begin() as conn:
+        return conn.execute(text(sql), params or {}).scalar()
+
+
+def delete_in_batches(sql, params, batch):
+    total = 0
+    while True:
+        with get_engine().begin() as conn:
+            n = conn.execute(text(sql), {**params, "batch": batch}).rowcount
+        total += n
+        if n < batch:
+            return total
+
+
+def archive(dataset, filters, start, end, path):
+    # Writes one month through the export's Parquet writer. A file already
+    # in place is from an earlier run; only complete files are renamed in.
+    if path.exists():
+        return 0
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    size = 0
+    with open(tmp, "wb") as f:
+        for chunk in stream_export(get_engine(), dataset, "parquet", filters, start, end):
+            f.write(chunk)
+            size += len(chunk)
+    os.replace(tmp, path)
+    return size
+
+
+def prune_artifacts(keep, batch):
+    queries.execute(queries.MIGRATE_MODEL_COLUMNS)
+    with stage("retention", "artifacts") as s:
+        s.add_rows(delete_in_batches(SQL_DELETE_ARTIFACTS, {"keep": keep}, batch))
+        return s.rows
+
+
+def compact_candles(months, batch, archive_dir):
+    # Symbols come from the coverage index that ingest maintains, their
+    # oldest 5m bar from the candles primary key. Coverage is trimmed only
+    # after the deletes, so a run interrupted mid-delete still finds the
+    # month it stopped in.
+    cutoff = _add_months(_month_start(datetime.now(timezone.utc)), -months)
+    deleted = 0
+    with get_engine().begin() as conn:
+        gaps.create_tables(conn)
+        symbols = conn.execute(text(SQL_5M_SYMBOLS)).scalars().all()
+    for symbol in symbols:
+        oldest = _scalar(SQL_OLDEST_5M, {"symbol": symbol})
+        for start, end in months_before(oldest, cutoff):
+            params = {"symbol": symbol, "start": start, "end": end}
+            with stage("retention", "candles_archive") as s:
+                path = archive_dir / "candles_5m" / symbol / f"{start:%Y-%m}.parquet"
+                s.add_bytes(archive("candles", {"symbol": symbol, "interval": "5m"}, start, end, path))
+            with stage("retention", "candles_downsample") as s, get_engine().begin() as conn:
+                hours = conn.execute(text(SQL_DOWNSAMPLE), params).scalars().all()
+                gaps.record_coverage(conn, symbol, "1h", [int(h.timestamp() * 1000) for h in hours])
+                s.add_rows(len(hours))
+            with stage("retention", "candles_delete") as s:
+                s.add_rows(delete_in_batches(SQL_DELETE_CANDLES, params, batch))
+                deleted += s.rows
+        with get_engine().begin() as conn:
+            queries.LOCK_COVERAGE.execute(conn, {"symbol": symbol, "interval": "5m"})
+            for stmt in SQL_TRIM_COVERAGE.split(";"):
+                conn.execute(text(stmt), {"symbol": symbol})
+    return deleted
+
+
+def archive_predictions(months, batch, archive_dir):
+    cutoff = _add_months(_month_start(datetime.now(timezone.utc)), -months)
+    oldest = _scalar(SQL_OLDEST_PREDICTION)
+    if oldest is None:
+        return 0
+    deleted = 0
+    for start, end in months_before(oldest, cutoff):
+        with stage("retention", "predictions_archive") as s:
+            path = archive_dir / "predictions" / f"{start:%Y-%m}.parquet"
+            s.add_bytes(archive("predictions", {}, start, end, path))
+        with stage("retention", "predictions_delete") as s:
+            s.add_rows(
+                delete_in_batches(SQL_DELETE_PREDICTIONS, {"start": start, "end": end}, batch)
+            )
+            deleted += s.rows
+    return deleted
+
+
+def _vacuum(tables):
+    # Plain VACUUM: no exclusive lock, makes the deleted space reusable
+    # (the file only shrinks when trailing pages empty out).
+    with get_engine().connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        for table in tables:
+            conn.execute(text(f"VACUUM (ANALYZE) {table}"))
+
+
+def main():
+    keep = int(os.getenv("RETENTION_ARTIFACTS_KEEP", "48"))
+    candle_months = int(os.getenv("RETENTION_CANDLES_5M_MONTHS", "12"))
+    prediction_months = int(os.getenv("RETENTION_PREDICTIONS_MONTHS", "3"))
+    batch = int(os.getenv("RETENTION_BATCH", "10000"))
+    archive_dir = Path(os.getenv("ARCHIVE_DIR", "archive"))
+
+    before = {t: _scalar(SQL_TABLE_BYTES, {"table": t}) for t in TABLES}
+    tuples = {t: _scalar(SQL_TABLE_ROWS, {"table": t}) for t in TABLES}
+    deleted = dict.fromkeys(TABLES, 0)
+
+    if keep:
+        deleted["model_artifacts"] = prune_artifacts(keep, batch)
+    if candle_months:
+        deleted["candles"] = compact_candles(candle_months, batch, archive_dir)
+    if prediction_months:
+        deleted["predictions"] = archive_predictions(prediction_months, batch, archive_dir)
+
+    touched = [t for t in TABLES if deleted[t]]
+    if touched:
+        with stage("retention", "vacuum"):
+            _vacuum(touched)
+
+    for t in TABLES:
+        after = _scalar(SQL_TABLE_BYTES, {"table": t})
+        # Deleted rows' share of the table before the run: space VACUUM made
+        # reusable, whether or not the file itself got smaller.
+        freed = int(before[t] * deleted[t] / tuples[t]) if tuples[t] and tuples[t] > 0 else 0
+        log_event(
+            "retention",
+            table=t,
+            rows_deleted=deleted[t],
+            bytes_before=before[t],
+            bytes_after=after,
+            bytes_reusable=min(freed, before[t]),
+        )
+        print(
+            f"{t:<16} deleted={deleted[t]:<10} size {before[t] / 2**20:.1f}MiB -> {after / 2**20:.1f}MiB"
+            f" (~{min(freed, before[t]) / 2**20:.1f}MiB reusable)"
+        )
+    push("retention")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,12 @@
-import os
 import pickle
 import pandas as pd
-from sqlalchemy import create_engine, text
-from arch import arch_model
+from src.db import queries
+from src.instrumentation import push, stage
 
-DB_URL = os.environ["DATABASE_URL"]
-if DB_URL.startswith("postgresql://"):
-    DB_URL = DB_URL.replace("postgresql://", "postgresql+psycopg://", 1)
-engine = create_engine(DB_URL, pool_pre_ping=True)
+SYMBOL = "BTCUSDT"
 
 def load_returns_5m() -> pd.DataFrame:
-    q = text("""
-      SELECT time, r
-      FROM returns_5m
-      WHERE symbol = 'BTCUSDT'
-      ORDER BY time
-    """)
-    with engine.begin() as conn:
-        rows = conn.execute(q).mappings().all()
+    rows = queries.fetch_all(queries.RETURNS_FOR_SYMBOL, {"symbol": SYMBOL})
     df = pd.DataFrame(rows)
     if df.empty or "r" not in df.columns:
         return pd.DataFrame(columns=["time", "r"])
@@ -26,24 +15,37 @@ def load_returns_5m() -> pd.DataFrame:
     return df.reset_index(drop=True)
 
 def main():
-    df = load_returns_5m()
+    with stage("train", "load") as s:
+        df = load_returns_5m()
+        s.add_rows(len(df))
     if df.empty:
         print("No returns available for training")
         return
 
-    am = arch_model(df["r"], mean="Zero", vol="GARCH", p=1, q=1, dist="normal")
-    res = am.fit(disp="off")
-
-    artifact = pickle.dumps({"model_type": "garch", "model": res})
-
-    with engine.begin() as conn:
-        conn.execute(
-            text("""
-              INSERT INTO model_artifacts (symbol, freq, target, trained_at, artifact)
-              VALUES ('BTCUSDT', '5m', 'abs_return', now(), :artifact)
-            """),
-            {"artifact": artifact},
+    with stage("train", "fit"):
+        from arch import arch_model
+
+        am = arch_model(df["r"], mean="Zero", vol="GARCH", p=1, q=1, dist="normal")
+        res = am.fit(disp="off")
+
+    with stage("train", "pickle"):
+        artifact = pickle.dumps({"model_type": "garch", "model": res})
+
+    queries.execute(queries.MIGRATE_MODEL_COLUMNS)
+    with stage("train", "write") as s:
+        queries.execute(
+            queries.INSERT_ARTIFACT,
+            {
+                "symbol": SYMBOL,
+                "freq": "5m",
+                "target": "abs_return",
+                "model": "garch",
+                "artifact": artifact,
+            },
         )
+        s.add_rows(1)
+        s.add_bytes(len(artifact))
+    push("train")
 
     print(f"trained rows={len(df)} saved artifact bytes={len(artifact)}")
 
@@ -1,10 +1,11 @@
 from src.modeling.dataset import get_hourly_df
-from sklearn.preprocessing import StandardScaler
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import mean_absolute_error
 
 
 def train(retrain_every: int = 24):
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.linear_model import LinearRegression
+    from sklearn.metrics import mean_absolute_error
+
     df = get_hourly_df()
 
     if df is None or df.empty:
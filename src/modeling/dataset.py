@@ -1,5 +1,5 @@
+from src.db import queries
 from src.db.db import get_engine
-from sqlalchemy import text
 import pandas as pd
 
 def get_hourly_df():
@@ -7,14 +7,8 @@ def get_hourly_df():
     try:
         engine = get_engine()
 
-        returns_query = """
-            SELECT symbol, time, close, r
-            FROM returns_5m
-            ORDER BY time;
-        """
-
         with engine.begin() as conn:
-            result = conn.execute(text(returns_query))
+            result = queries.RETURNS_ALL.execute(conn)
 
             data = result.fetchall()
 
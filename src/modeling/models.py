@@ -0,0 +1,120 @@
+import math
+import pickle
+import numpy as np
+
+BAR_MINUTES = 5
+BARS_PER_HOUR = 60 // BAR_MINUTES
+
+
+def horizon_bars(freq: str) -> int:
+    unit = freq[-1]
+    value = int(freq[:-1])
+    if unit == "h":
+        return value * BARS_PER_HOUR
+    if unit == "d":
+        return value * 24 * BARS_PER_HOUR
+    raise ValueError(f"Unsupported horizon: {freq}")
+
+
+# Every model takes 5m log returns (oldest first) and a list of horizons in
+# bars, and returns ({horizon_bars: yhat}, artifact) where yhat is the
+# forecast 1-sigma |return| over the horizon.
+
+
+def garch(r, horizons):
+    from arch import arch_model
+
+    am = arch_model(r, mean="Zero", vol="GARCH", p=1, q=1, dist="normal")
+    res = am.fit(disp="off")
+    f = res.forecast(horizon=max(horizons), reindex=False)
+    var_path = f.variance.iloc[-1].to_numpy()
+    return {h: float(var_path[:h].sum() ** 0.5) for h in horizons}, res
+
+
+def egarch(r, horizons):
+    from arch import arch_model
+
+    # EGARCH models log-variance, so fit on percent returns for a sane scale
+    # and simulate: there is no closed-form multi-step forecast.
+    am = arch_model(r * 100, mean="Zero", vol="EGARCH", p=1, o=1, q=1, dist="normal")
+    res = am.fit(disp="off")
+    f = res.forecast(
+        horizon=max(horizons), reindex=False, method="simulation", simulations=500
+    )
+    var_path = f.variance.iloc[-1].to_numpy() / 100**2
+    return {h: float(var_path[:h].sum() ** 0.5) for h in horizons}, res
+
+
+def _ols(X, y):
+    X = np.column_stack([np.ones(len(X)), X])
+    beta, *_ = np.linalg.lstsq(X, y, rcond=None)
+    return beta
+
+
+def har_rv(r, horizons):
+    # HAR on hourly realized variance: RV_{t+1} ~ RV_t + mean(RV, 24h) + mean(RV, 168h),
+    # iterated forward for multi-hour horizons.
+    n_hours = len(r) // BARS_PER_HOUR
+    tail = np.asarray(r[len(r) - n_hours * BARS_PER_HOUR:], dtype=float)
+    rv = (tail.reshape(n_hours, BARS_PER_HOUR) ** 2).sum(axis=1)
+    day, week = 24, 168
+    if n_hours <= week + 1:
+        raise ValueError(f"har_rv needs more than {week + 1} hours of returns")
+
+    def features(series, t):
+        return [series[t], series[t - day + 1:t + 1].mean(), series[t - week + 1:t + 1].mean()]
+
+    X = np.array([features(rv, t) for t in range(week - 1, n_hours - 1)])
+    y = rv[week:]
+    beta = _ols(X, y)
+
+    path = list(rv)
+    max_hours = math.ceil(max(horizons) / BARS_PER_HOUR)
+    for _ in range(max_hours):
+        x = features(np.asarray(path), len(path) - 1)
+        path.append(max(float(beta[0] + np.dot(beta[1:], x)), 0.0))
+    ahead = np.asarray(path[n_hours:])
+
+    out = {}
+    for h in horizons:
+        full, part = divmod(h, BARS_PER_HOUR)
+        var = ahead[:full].sum() + (ahead[full] * part / BARS_PER_HOUR if part else 0.0)
+        out[h] = float(var ** 0.5)
+    return out, {"beta": beta.tolist(), "features": ["rv_1h", "rv_24h", "rv_168h"]}
+
+
+def linear(r, horizons, lags=4):
+    # The lagged-|r| regression from backtest.py, iterated forward. E|r| =
+    # sigma * sqrt(2/pi) under normality, so each step is converted back to a
+    # variance before summing over the horizon.
+    a = np.abs(np.asarray(r, dtype=float))
+    X = np.column_stack([a[lags - 1 - k:len(a) - 1 - k] for k in range(lags)])
+    y = a[lags:]
+    beta = _ols(X, y)
+
+    hist = list(a[-lags:])
+    var = []
+    for _ in range(max(horizons)):
+        x = hist[::-1][:lags]
+        pred = max(float(beta[0] + np.dot(beta[1:], x)), 0.0)
+        hist.append(pred)
+        var.append(pred * pred * math.pi / 2)
+    cum = np.cumsum(var)
+    return {h: float(cum[h - 1] ** 0.5) for h in horizons}, {"beta": beta.tolist(), "lags": lags}
+
+
+# name -> (fit/forecast function, bars of history it uses)
+MODELS = {
+    "garch": (garch, 1000),
+    "egarch": (egarch, 1000),
+    "har_rv": (har_rv, 4000),
+    "linear": (linear, 4000),
+}
+
+
+def run_model(name, r, horizons):
+    # Process-pool entry point: fits one model for all horizons and pickles
+    # its artifact in the worker so only bytes cross back.
+    fn, bars = MODELS[name]
+    forecasts, model = fn(np.asarray(r[-bars:], dtype=float), horizons)
+    return name, forecasts, pickle.dumps({"model_type": name, "model": model})
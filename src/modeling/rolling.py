@@ -0,0 +1,212 @@
+import bisect
+import math
+import threading
+from collections import deque
+from datetime import timedelta
+
+# Running sums drift with enough add/remove cycles; rebuild them exactly
+# every this many updates.
+_RESUM_EVERY = 4096
+
+# SortedWindow block size: blocks split past 2 * _LOAD values.
+_LOAD = 256
+
+
+class SortedWindow:
+    # Time-keyed values held twice: in arrival order for eviction and in a
+    # blocked sorted list for rank queries. Blocks hold at most 2 * _LOAD
+    # values and a Fenwick tree over their lengths gives each block's
+    # offset, so add, evict and rank cost O(log n + _LOAD) however long
+    # the window grows.
+    def __init__(self):
+        self._items = deque()
+        self._blocks = []
+        self._maxes = []
+        self._tree = [0]
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def last_time(self):
+        return self._items[-1][0] if self._items else None
+
+    def _rebuild(self):
+        # after a block split or removal; amortized over _LOAD updates
+        n = len(self._blocks)
+        tree = [0] * (n + 1)
+        for i, block in enumerate(self._blocks, 1):
+            tree[i] += len(block)
+            parent = i + (i & -i)
+            if parent <= n:
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _resize(self, i, delta):
+        i += 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _count_before(self, i):
+        # values in blocks[:i]
+        total = 0
+        while i:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def add(self, t, v):
+        self._items.append((t, v))
+        if not self._blocks:
+            self._blocks.append([v])
+            self._maxes.append(v)
+            self._rebuild()
+            return
+        i = min(bisect.bisect_left(self._maxes, v), len(self._blocks) - 1)
+        block = self._blocks[i]
+        bisect.insort(block, v)
+        self._maxes[i] = block[-1]
+        if len(block) > 2 * _LOAD:
+            self._blocks[i:i + 1] = [block[:_LOAD], block[_LOAD:]]
+            self._maxes[i:i + 1] = [block[_LOAD - 1], block[-1]]
+            self._rebuild()
+        else:
+            self._resize(i, 1)
+
+    def _discard(self, v):
+        i = bisect.bisect_left(self._maxes, v)
+        block = self._blocks[i]
+        del block[bisect.bisect_left(block, v)]
+        if block:
+            self._maxes[i] = block[-1]
+            self._resize(i, -1)
+        else:
+            del self._blocks[i]
+            del self._maxes[i]
+            self._rebuild()
+
+    def evict_before(self, cutoff):
+        while self._items and self._items[0][0] < cutoff:
+            _, v = self._items.popleft()
+            self._discard(v)
+
+    def percentile_of(self, v):
+        if not self._items:
+            return None
+        # blocks before i hold only values <= v, blocks after i none
+        i = bisect.bisect_right(self._maxes, v)
+        rank = self._count_before(i)
+        if i < len(self._blocks):
+            rank += bisect.bisect_right(self._blocks[i], v)
+        return rank / len(self._items)
+
+
+class RollingMoments:
+    # Population mean/stdev over a time window in O(1). The newest bucket may
+    # be revised in place (a partial hour that keeps receiving 5m returns).
+    def __init__(self):
+        self._items = deque()
+        self._s1 = 0.0
+        self._s2 = 0.0
+        self._ops = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def last(self):
+        return self._items[-1][1] if self._items else None
+
+    def _bump(self):
+        self._ops += 1
+        if self._ops >= _RESUM_EVERY:
+            self._s1 = sum(v for _, v in self._items)
+            self._s2 = sum(v * v for _, v in self._items)
+            self._ops = 0
+
+    def add(self, t, v):
+        if self._items and self._items[-1][0] == t:
+            _, old = self._items.pop()
+            self._s1 -= old
+            self._s2 -= old * old
+        self._items.append((t, v))
+        self._s1 += v
+        self._s2 += v * v
+        self._bump()
+
+    def evict_before(self, cutoff):
+        while self._items and self._items[0][0] < cutoff:
+            _, v = self._items.popleft()
+            self._s1 -= v
+            self._s2 -= v * v
+            self._bump()
+
+    def pstdev(self):
+        n = len(self._items)
+        if n < 2:
+            return None
+        mean = self._s1 / n
+        return math.sqrt(max(self._s2 / n - mean * mean, 0.0))
+
+
+class VolatilityState:
+    # Incrementally maintained inputs for the /v1/latest regime fields:
+    # hourly-binned returns for short/long realized vol and a sorted window of
+    # predictions for the percentile of the latest forecast.
+    def __init__(self, short_hours=24, long_hours=168, regime_hours=168):
+        self.short_window = timedelta(hours=short_hours)
+        self.long_window = timedelta(hours=long_hours)
+        self.regime_window = timedelta(hours=regime_hours)
+        self.preds = SortedWindow()
+        self.last_prediction_time = None
+        self.returns_generation = None
+        self.reset_returns()
+        self.lock = threading.Lock()
+
+    def reset_returns(self):
+        # for when returns already taken in were revised (a gap repair)
+        self.rv_short = RollingMoments()
+        self.rv_long = RollingMoments()
+        self.last_return_time = None
+        self._hour = None
+        self._hour_sum = 0.0
+
+    def add_returns(self, rows):
+        for row in rows:
+            t = row["time"]
+            if self.last_return_time is not None and t <= self.last_return_time:
+                continue
+            self.last_return_time = t
+            if row["r"] is None:
+                continue
+            hour = t.replace(minute=0, second=0, microsecond=0)
+            if hour != self._hour:
+                self._hour = hour
+                self._hour_sum = 0.0
+            self._hour_sum += float(row["r"])
+            self.rv_short.add(hour, self._hour_sum)
+            self.rv_long.add(hour, self._hour_sum)
+
+    def add_predictions(self, rows):
+        for row in rows:
+            t = row["predicted_for"]
+            if self.last_prediction_time is not None and t <= self.last_prediction_time:
+                continue
+            self.last_prediction_time = t
+            if row["yhat"] is not None:
+                self.preds.add(t, float(row["yhat"]))
+
+    def evict(self, now):
+        self.rv_short.evict_before(now - self.short_window)
+        self.rv_long.evict_before(now - self.long_window)
+        self.preds.evict_before(now - self.regime_window)
+
+    def last_abs_return(self):
+        last = self.rv_long.last
+        return abs(last) if last is not None else None
+
+    def percentile_of(self, yhat):
+        if yhat is None:
+            return None
+        return self.preds.percentile_of(yhat)
@@ -1,5 +1,7 @@
 from sqlalchemy import text
 from src.db.db import get_engine
+from src.ingestion import gaps
+from src.instrumentation import push, stage
 
 SQL_CREATE = """
 CREATE TABLE IF NOT EXISTS returns_1d (
@@ -11,44 +13,99 @@ CREATE TABLE IF NOT EXISTS returns_1d (
 );
 """
 
+# A day with no candles at all leaves the next day's r NULL instead of a
+# two-day return. Each run recomputes from the newest built day (it may
+# have still been open), the days of repairs not built yet that fetched
+# bars plus the day after each, and the day each candle_coverage run starts on, which
+# catches returns stored across a missing day before r was nulled there.
+# Unchanged rows are filtered out before the upsert so they are not locked.
 SQL_INSERT = """
-WITH daily_close AS (
-    SELECT
-        symbol,
-        DATE(open_time) AS day,
-        close,
-        ROW_NUMBER() OVER (
-            PARTITION BY symbol, DATE(open_time)
-            ORDER BY open_time DESC
-        ) AS rn
-    FROM candles
-    WHERE interval = '5m'
+WITH RECURSIVE symbols AS (
+  -- skip scan over the candles primary key
+  SELECT MIN(symbol) AS symbol FROM candles WHERE interval = '5m'
+  UNION ALL
+  SELECT (SELECT MIN(symbol) FROM candles WHERE interval = '5m' AND symbol > s.symbol)
+  FROM symbols s
+  WHERE s.symbol IS NOT NULL
+),
+kept AS (
+  -- the oldest 5m bar retention left: the day before its day is gone, so
+  -- that day's stored row is kept rather than recomputed with r NULL
+  SELECT
+    s.symbol,
+    (SELECT MIN(open_time) FROM candles c WHERE c.symbol = s.symbol AND c.interval = '5m')
+      AS first_bar
+  FROM symbols s
+  WHERE s.symbol IS NOT NULL
+),
+repaired AS (
+  -- repairs not yet built into returns_1d, marked as built by this statement
+  UPDATE candle_gap_repairs
+  SET returns_1d_built_at = now()
+  WHERE interval = '5m' AND bars_fetched > 0 AND returns_1d_built_at IS NULL
+  RETURNING symbol, gap_start, gap_end
 ),
-daily_close_dedup AS (
-    SELECT symbol, day, close
-    FROM daily_close
-    WHERE rn = 1
+ranges AS (
+  SELECT
+    s.symbol,
+    COALESCE(
+      (SELECT MAX(day) FROM returns_1d d WHERE d.symbol = s.symbol) - 1,
+      DATE '-infinity'
+    ) AS lo,
+    DATE 'infinity' AS hi
+  FROM symbols s
+  WHERE s.symbol IS NOT NULL
+  UNION ALL
+  SELECT symbol, DATE(gap_start) - 1, DATE(gap_end) + 1
+  FROM repaired
+  UNION ALL
+  SELECT symbol, DATE(start_time) - 1, DATE(start_time)
+  FROM candle_coverage
+  WHERE interval = '5m'
 ),
-daily_returns AS (
+computed AS (
+  -- day lo itself is only read for the LAG of the day after it
+  SELECT DISTINCT ON (x.symbol, x.day) x.symbol, x.day, x.close, x.r
+  FROM ranges g
+  CROSS JOIN LATERAL (
     SELECT
-        symbol,
-        day,
-        close,
-        LN(close) - LN(LAG(close) OVER (PARTITION BY symbol ORDER BY day)) AS r
-    FROM daily_close_dedup
+      symbol,
+      day,
+      close,
+      CASE WHEN LAG(day) OVER w = day - 1
+           THEN LN(close) - LN(LAG(close) OVER w) END AS r
+    FROM (
+      SELECT DISTINCT ON (DATE(c.open_time)) c.symbol, DATE(c.open_time) AS day, c.close
+      FROM candles c
+      WHERE c.symbol = g.symbol AND c.interval = '5m'
+        AND c.open_time >= g.lo AND c.open_time < g.hi + 1
+      ORDER BY DATE(c.open_time), c.open_time DESC
+    ) daily_close
+    WINDOW w AS (ORDER BY day)
+  ) x
+  WHERE x.day > g.lo
+  ORDER BY x.symbol, x.day
 )
 INSERT INTO returns_1d (symbol, day, close, r)
-SELECT symbol, day, close, r
-FROM daily_returns
-ON CONFLICT (symbol, day) DO NOTHING;
+SELECT c.symbol, c.day, c.close, c.r
+FROM computed c
+JOIN kept k ON k.symbol = c.symbol
+LEFT JOIN returns_1d d ON d.symbol = c.symbol AND d.day = c.day
+WHERE d.day IS NULL
+   OR (c.day > DATE(k.first_bar) AND (d.close, d.r) IS DISTINCT FROM (c.close, c.r))
+ON CONFLICT (symbol, day) DO UPDATE SET close = EXCLUDED.close, r = EXCLUDED.r;
 """
 
 def main() -> None:
     engine = get_engine()
 
     with engine.begin() as conn:
-        conn.execute(text(SQL_CREATE))
-        conn.execute(text(SQL_INSERT))
+        with stage("build_daily_returns", "create"):
+            conn.execute(text(SQL_CREATE))
+            gaps.create_tables(conn)
+        with stage("build_daily_returns", "insert") as s:
+            s.add_rows(conn.execute(text(SQL_INSERT)).rowcount)
+    push("build_daily_returns")
 
 if __name__ == "__main__":
     main()
@@ -1,5 +1,9 @@
 from sqlalchemy import text
+from src import hot_window
+from src.db import queries
 from src.db.db import get_engine
+from src.ingestion import gaps
+from src.instrumentation import observe_freshness, push, stage
 
 SQL_CREATE = """
 CREATE TABLE IF NOT EXISTS returns_5m (
@@ -9,26 +13,132 @@ CREATE TABLE IF NOT EXISTS returns_5m (
   r NUMERIC,
   PRIMARY KEY (symbol, time)
 );
+CREATE TABLE IF NOT EXISTS returns_5m_generations (
+  symbol TEXT PRIMARY KEY,
+  generation BIGINT NOT NULL
+);
 """
 
+# r is only a one-bar return: after a missing bar it is NULL rather than a
+# multi-bar move. Each run only computes bars past the symbol's newest
+# return, the windows of gap repairs that fetched bars and have not been
+# built yet (and the bar after, whose r the repair completes), and the
+# first bar of every candle_coverage run: that catches returns stored
+# across a gap before r was nulled there, and gaps the exchange never
+# fills. Rows that come out unchanged are filtered before the upsert, since
+# ON CONFLICT locks a conflicting row even when it leaves it as it is.
 SQL_INSERT = """
-INSERT INTO returns_5m (symbol, time, close, r)
+WITH RECURSIVE symbols AS (
+  -- skip scan over the candles primary key
+  SELECT MIN(symbol) AS symbol FROM candles WHERE interval = '5m'
+  UNION ALL
+  SELECT (SELECT MIN(symbol) FROM candles WHERE interval = '5m' AND symbol > s.symbol)
+  FROM symbols s
+  WHERE s.symbol IS NOT NULL
+),
+kept AS (
+  -- the oldest 5m bar retention left: the bar before it is gone, so its
+  -- stored r is kept rather than recomputed as NULL
+  SELECT
+    s.symbol,
+    (SELECT MIN(open_time) FROM candles c WHERE c.symbol = s.symbol AND c.interval = '5m')
+      AS first_bar
+  FROM symbols s
+  WHERE s.symbol IS NOT NULL
+),
+repaired AS (
+  -- repairs not yet built into returns_5m, marked as built by this statement
+  UPDATE candle_gap_repairs
+  SET returns_5m_built_at = now()
+  WHERE interval = '5m' AND bars_fetched > 0 AND returns_5m_built_at IS NULL
+  RETURNING symbol, gap_start, gap_end
+),
+ranges AS (
+  SELECT
+    s.symbol,
+    COALESCE(
+      (SELECT MAX(time) FROM returns_5m r WHERE r.symbol = s.symbol),
+      '-infinity'
+    ) AS lo,
+    TIMESTAMPTZ 'infinity' AS hi
+  FROM symbols s
+  WHERE s.symbol IS NOT NULL
+  UNION ALL
+  SELECT symbol, gap_start - interval '5 minutes', gap_end + interval '5 minutes'
+  FROM repaired
+  UNION ALL
+  SELECT symbol, start_time - interval '5 minutes', start_time
+  FROM candle_coverage
+  WHERE interval = '5m'
+),
+computed AS (
+  -- lo itself is only read for the LAG of the bar after it
+  SELECT DISTINCT ON (x.symbol, x.time) x.symbol, x.time, x.close, x.r
+  FROM ranges g
+  CROSS JOIN LATERAL (
+    SELECT
+      c.symbol,
+      c.open_time AS time,
+      c.close,
+      CASE WHEN LAG(c.open_time) OVER w = c.open_time - interval '5 minutes'
+           THEN LN(c.close) - LN(LAG(c.close) OVER w) END AS r
+    FROM candles c
+    WHERE c.symbol = g.symbol AND c.interval = '5m'
+      AND c.open_time >= g.lo AND c.open_time <= g.hi
+    WINDOW w AS (ORDER BY c.open_time)
+  ) x
+  WHERE x.time > g.lo
+  ORDER BY x.symbol, x.time
+),
+ins AS (
+  INSERT INTO returns_5m (symbol, time, close, r)
+  SELECT c.symbol, c.time, c.close, c.r
+  FROM computed c
+  JOIN kept k ON k.symbol = c.symbol
+  LEFT JOIN returns_5m r ON r.symbol = c.symbol AND r.time = c.time
+  WHERE r.time IS NULL
+     OR (c.time > k.first_bar AND (r.close, r.r) IS DISTINCT FROM (c.close, c.r))
+  ON CONFLICT (symbol, time) DO UPDATE SET close = EXCLUDED.close, r = EXCLUDED.r
+  RETURNING symbol, time
+)
 SELECT
   symbol,
-  open_time AS time,
-  close,
-  LN(close) - LN(LAG(close) OVER (PARTITION BY symbol ORDER BY open_time)) AS r
-FROM candles
-WHERE interval = '5m'
-ON CONFLICT (symbol, time) DO NOTHING;
+  COUNT(*) AS n,
+  MIN(time) AS earliest,
+  MAX(time) AS latest,
+  -- the statement's snapshot: the newest return before this run
+  MIN(time) <= (SELECT MAX(r.time) FROM returns_5m r WHERE r.symbol = ins.symbol) AS revised
+FROM ins
+GROUP BY symbol;
 """
 
 def main() -> None:
     engine = get_engine()
 
     with engine.begin() as conn:
-        conn.execute(text(SQL_CREATE))
-        conn.execute(text(SQL_INSERT))
+        with stage("build_hourly_returns", "create"):
+            for stmt in SQL_CREATE.split(";"):
+                if stmt.strip():
+                    conn.execute(text(stmt))
+            gaps.create_tables(conn)
+        with stage("build_hourly_returns", "insert") as s:
+            inserted = conn.execute(text(SQL_INSERT)).mappings().all()
+            s.add_rows(sum(row["n"] for row in inserted))
+
+    # after commit, so readers never see returns Postgres does not have
+    with stage("build_hourly_returns", "hot_window") as s:
+        for row in inserted:
+            s.add_rows(hot_window.sync(row["symbol"], row["earliest"]))
+
+    # Announced only once the hot window has caught up, so a reader that
+    # reloads on the new generation cannot pick up the old values from it.
+    revised = [{"symbol": row["symbol"]} for row in inserted if row["revised"]]
+    if revised:
+        queries.execute(queries.BUMP_RETURNS_GENERATION, revised)
+
+    for row in inserted:
+        observe_freshness("returns_5m", row["symbol"], row["latest"])
+    push("build_hourly_returns")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,169 @@
+import os
+from datetime import timedelta
+from sqlalchemy import text
+from src.db import queries
+from src.db.db import get_engine
+from src.instrumentation import push, stage
+
+SQL_CREATE = """
+CREATE TABLE IF NOT EXISTS prediction_scores (
+  symbol TEXT NOT NULL,
+  freq TEXT NOT NULL,
+  target TEXT NOT NULL,
+  model TEXT NOT NULL,
+  predicted_for TIMESTAMPTZ NOT NULL,
+  yhat DOUBLE PRECISION NOT NULL,
+  realized DOUBLE PRECISION NOT NULL,
+  bars INTEGER NOT NULL,
+  abs_err DOUBLE PRECISION NOT NULL,
+  sq_err DOUBLE PRECISION NOT NULL,
+  qlike DOUBLE PRECISION,
+  scored_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (symbol, freq, target, model, predicted_for)
+);
+CREATE INDEX IF NOT EXISTS prediction_scores_predicted_for_idx
+  ON prediction_scores (predicted_for);
+CREATE TABLE IF NOT EXISTS prediction_score_rollups (
+  symbol TEXT NOT NULL,
+  freq TEXT NOT NULL,
+  target TEXT NOT NULL,
+  model TEXT NOT NULL,
+  period TEXT NOT NULL,
+  n INTEGER NOT NULL,
+  mae DOUBLE PRECISION NOT NULL,
+  rmse DOUBLE PRECISION NOT NULL,
+  mean_qlike DOUBLE PRECISION,
+  bias DOUBLE PRECISION NOT NULL,
+  updated_at TIMESTAMPTZ NOT NULL,
+  PRIMARY KEY (symbol, freq, target, model, period)
+);
+"""
+
+# Tables created before predictions carried a model only ever held GARCH.
+SQL_MIGRATE = """
+DO $$
+DECLARE
+  t TEXT;
+BEGIN
+  FOREACH t IN ARRAY ARRAY['prediction_scores', 'prediction_score_rollups'] LOOP
+    IF NOT EXISTS (
+      SELECT 1 FROM information_schema.columns
+      WHERE table_name = t AND column_name = 'model'
+    ) THEN
+      EXECUTE format('ALTER TABLE %I ADD COLUMN model TEXT NOT NULL DEFAULT ''garch''', t);
+      EXECUTE format('ALTER TABLE %I ALTER COLUMN model DROP DEFAULT', t);
+      EXECUTE format('ALTER TABLE %I DROP CONSTRAINT %I', t, t || '_pkey');
+      EXECUTE format(
+        'ALTER TABLE %I ADD PRIMARY KEY (symbol, freq, target, model, %I)',
+        t, CASE t WHEN 'prediction_scores' THEN 'predicted_for' ELSE 'period' END
+      );
+    END IF;
+  END LOOP;
+END
+$$
+"""
+
+# A prediction for predicted_for P with horizon H (its freq) covers the 5m
+# returns in (P - H, P]. It is scored once returns_5m has reached P, looking
+# back only :lookback so each run touches just the newly completed hours.
+# QLIKE uses the forecast variance yhat^2 against the realized proxy
+# realized^2: ln(h) + realized^2 / h.
+SQL_SCORE = """
+INSERT INTO prediction_scores (
+  symbol, freq, target, model, predicted_for, yhat, realized, bars, abs_err, sq_err, qlike
+)
+SELECT
+  symbol, freq, target, model, predicted_for, yhat, realized, bars,
+  ABS(yhat - realized),
+  (yhat - realized) ^ 2,
+  CASE WHEN yhat > 0 THEN LN(yhat ^ 2) + (realized ^ 2) / (yhat ^ 2) END
+FROM (
+  SELECT
+    p.symbol, p.freq, p.target, p.model, p.predicted_for,
+    p.yhat::float8 AS yhat,
+    ABS(x.sum_r)::float8 AS realized,
+    x.bars
+  FROM predictions p
+  JOIN LATERAL (
+    SELECT SUM(r.r) AS sum_r, COUNT(r.r) AS bars
+    FROM returns_5m r
+    WHERE r.symbol = p.symbol
+      AND r.time > p.predicted_for - CAST(p.freq AS interval)
+      AND r.time <= p.predicted_for
+  ) x ON x.bars > 0
+  WHERE p.target = 'abs_return'
+    AND p.predicted_for > now() - :lookback
+    AND p.predicted_for <= (
+      SELECT MAX(r2.time) FROM returns_5m r2 WHERE r2.symbol = p.symbol
+    )
+    AND NOT EXISTS (
+      SELECT 1
+      FROM prediction_scores s
+      WHERE s.symbol = p.symbol AND s.freq = p.freq AND s.target = p.target
+        AND s.model = p.model AND s.predicted_for = p.predicted_for
+    )
+) scored
+ON CONFLICT (symbol, freq, target, model, predicted_for) DO NOTHING;
+"""
+
+SQL_ROLLUP = """
+WITH periods(period, span) AS (
+  VALUES ('24h', interval '24 hours'), ('7d', interval '7 days'), ('30d', interval '30 days')
+)
+INSERT INTO prediction_score_rollups (
+  symbol, freq, target, model, period, n, mae, rmse, mean_qlike, bias, updated_at
+)
+SELECT
+  s.symbol, s.freq, s.target, s.model, w.period,
+  COUNT(*),
+  AVG(s.abs_err),
+  SQRT(AVG(s.sq_err)),
+  AVG(s.qlike),
+  AVG(s.yhat - s.realized),
+  now()
+FROM periods w
+JOIN prediction_scores s ON s.predicted_for >= now() - w.span
+GROUP BY s.symbol, s.freq, s.target, s.model, w.period
+ON CONFLICT (symbol, freq, target, model, period) DO UPDATE SET
+  n = EXCLUDED.n,
+  mae = EXCLUDED.mae,
+  rmse = EXCLUDED.rmse,
+  mean_qlike = EXCLUDED.mean_qlike,
+  bias = EXCLUDED.bias,
+  updated_at = EXCLUDED.updated_at;
+"""
+
+# now() is fixed for the transaction, so anything not refreshed above has
+# no scores left in its period.
+SQL_ROLLUP_PRUNE = """
+DELETE FROM prediction_score_rollups WHERE updated_at < now();
+"""
+
+def main(lookback_hours: int = None) -> None:
+    if lookback_hours is None:
+        lookback_hours = int(os.getenv("SCORE_LOOKBACK_HOURS", "168"))
+    engine = get_engine()
+
+    # DDL commits on its own: even a no-op CREATE INDEX IF NOT EXISTS locks
+    # the table, and that must not be held across the scoring below.
+    with stage("score_predictions", "create"), engine.begin() as conn:
+        for stmt in SQL_CREATE.split(";"):
+            if stmt.strip():
+                conn.execute(text(stmt))
+        queries.MIGRATE_MODEL_COLUMNS.execute(conn)
+        conn.execute(text(SQL_MIGRATE))
+
+    with engine.begin() as conn:
+        with stage("score_predictions", "score") as s:
+            s.add_rows(
+                conn.execute(
+                    text(SQL_SCORE), {"lookback": timedelta(hours=lookback_hours)}
+                ).rowcount
+            )
+        with stage("score_predictions", "rollup") as s:
+            s.add_rows(conn.execute(text(SQL_ROLLUP)).rowcount)
+            conn.execute(text(SQL_ROLLUP_PRUNE))
+    push("score_predictions")
+
+if __name__ == "__main__":
+    main()